@@ -1,17 +1,22 @@
-from datetime import timedelta
+from datetime import datetime
+from bson import ObjectId
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
+from mongoengine.errors import NotUniqueError
 from app.models.user import User
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    hash_password,
+    verify_and_update_password,
     create_access_token,
-    create_refresh_token
+    create_refresh_token,
+    decode_refresh_token_subject,
+    hash_refresh_token
 )
 from app.core.config import get_settings
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import Optional, Tuple
 from app.core.dependencies import get_current_user
+from app.services.principal_cache import principal_cache
 
 settings = get_settings()
 
@@ -22,45 +27,60 @@ class UserCreate(BaseModel):
     password: str
     first_name: str
     last_name: str
-    birth_details: dict
+    birth_details: Optional[dict] = None
 
 class Token(BaseModel):
     access_token: str
     refresh_token: str
+    token_type: str
+
 class TokenData(BaseModel):
     email: Optional[EmailStr] = None
 
 class UserResponse(BaseModel):
     id: str
     email: EmailStr
-    first_name: str
-    last_name: str
-    birth_details: dict
-
-    token_type: str
+    name: str
+    chartId: Optional[str] = None
+    preferences: dict
+
+def token_claims(user: User) -> dict:
+    """Claims read-only routes may trust instead of loading the user."""
+    return {"email": user.email, "name": user.name}
+
+def _refresh_token_update(user_id: str) -> Tuple[str, dict]:
+    """A new refresh token and the update storing its hash in place of the previous one."""
+    refresh_token, expires_at = create_refresh_token(user_id)
+    return refresh_token, {
+        "set__refresh_token_hash": hash_refresh_token(refresh_token),
+        "set__refresh_token_expires_at": expires_at,
+        "unset__refresh_token": True
+    }
 
 @router.post("/signup", response_model=Token)
 async def signup(user_data: UserCreate):
-    """Create a new user account."""
-    if User.objects(email=user_data.email).first():
+    """Create a new user account with a single insert."""
+    # Birth details feed content generation until the user creates a chart
+    preferences = {"birth_details": user_data.birth_details} if user_data.birth_details else {}
+    user = User(
+        id=ObjectId(),
+        email=user_data.email,
+        password_hash=await hash_password(user_data.password),
+        name=f"{user_data.first_name} {user_data.last_name}".strip(),
+        preferences=preferences
+    )
+    access_token = create_access_token(str(user.id), claims=token_claims(user))
+    refresh_token, expires_at = create_refresh_token(str(user.id))
+    user.refresh_token_hash = hash_refresh_token(refresh_token)
+    user.refresh_token_expires_at = expires_at
+    try:
+        # The unique index on email rejects duplicates, no lookup needed first
+        user.save(force_insert=True)
+    except NotUniqueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
-    user = User(
-        email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
-        first_name=user_data.first_name,
-        last_name=user_data.last_name,
-        birth_details=user_data.birth_details
-    )
-    user.save()
-
-    access_token = create_access_token(str(user.id))
-    refresh_token = create_refresh_token(str(user.id))
-    user.refresh_token = refresh_token
-    user.save()
 
     return {
         "access_token": access_token,
@@ -70,21 +90,24 @@ async def signup(user_data: UserCreate):
 
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    """Login with email and password."""
-    user = User.objects(email=form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    """Login with email and password: one read, then one update of the user."""
+    user = User.objects(email=form_data.username).only('id', 'email', 'name', 'password_hash').first()
+    if user:
+        verified, new_hash = await verify_and_update_password(form_data.password, user.password_hash)
+    if not user or not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    user.update_last_login()
-    
-    access_token = create_access_token(str(user.id))
-    refresh_token = create_refresh_token(str(user.id))
-    user.refresh_token = refresh_token
-    user.save()
+
+    access_token = create_access_token(str(user.id), claims=token_claims(user))
+    refresh_token, update = _refresh_token_update(str(user.id))
+    update["set__last_login"] = datetime.utcnow()
+    if new_hash:
+        # Stored with an outdated cost factor
+        update["set__password_hash"] = new_hash
+    User.objects(id=user.id).update_one(**update)
 
     return {
         "access_token": access_token,
@@ -97,19 +120,30 @@ class RefreshToken(BaseModel):
 
 @router.post("/refresh-token", response_model=Token)
 async def refresh_token(token_data: RefreshToken):
-    """Get a new access token using a refresh token."""
-    user = User.objects(refresh_token=token_data.refresh_token).first()
+    """Get a new access token using a refresh token.
+
+    The stored hash is matched and rotated in one find-and-modify, so a
+    refresh token can be used only once.
+    """
+    invalid_token = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    user_id = decode_refresh_token_subject(token_data.refresh_token)
+    if user_id is None or not ObjectId.is_valid(user_id):
+        raise invalid_token
+
+    refresh_token, update = _refresh_token_update(user_id)
+    user = User.objects(
+        id=user_id,
+        refresh_token_hash=hash_refresh_token(token_data.refresh_token),
+        refresh_token_expires_at__gt=datetime.utcnow()
+    ).only('id', 'email', 'name').modify(new=True, **update)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid refresh token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        raise invalid_token
 
-    access_token = create_access_token(str(user.id))
-    refresh_token = create_refresh_token(str(user.id))
-    user.refresh_token = refresh_token
-    user.save()
+    access_token = create_access_token(str(user.id), claims=token_claims(user))
 
     return {
         "access_token": access_token,
@@ -120,8 +154,13 @@ async def refresh_token(token_data: RefreshToken):
 @router.post("/logout")
 async def logout(current_user: User = Depends(get_current_user)):
     """Logout the current user."""
-    current_user.refresh_token = None
-    current_user.save()
+    # current_user is a projection without the refresh token; clear it in place
+    User.objects(id=current_user.id).update_one(
+        unset__refresh_token=True,
+        unset__refresh_token_hash=True,
+        unset__refresh_token_expires_at=True
+    )
+    principal_cache.invalidate(current_user.id)
     return {"message": "Successfully logged out"}
 
 
@@ -131,7 +170,7 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     return {
         "id": str(current_user.id),
         "email": current_user.email,
-        "first_name": current_user.first_name,
-        "last_name": current_user.last_name,
-        "birth_details": current_user.birth_details
+        "name": current_user.name,
+        "chartId": str(current_user.chartId) if current_user.chartId else None,
+        "preferences": current_user.preferences or {}
     }
@@ -1,57 +1,129 @@
+import math
+from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException
 from app.models.user import User
-from app.models.birthchart import BirthChart
-from app.services.astrology_client import create_birth_chart, get_daily_transits
-from app.core.dependencies import get_current_user
+from app.models.birthchart import BirthChart, BirthData as StoredBirthData, ChartData
+from app.services.astrology_client import (
+    AstrologyServiceBusyError, create_birth_chart, get_daily_transits, single_flight, chart_batcher, breaker, request_metrics
+)
+from app.services.chart_cache import chart_cache
+from app.services.transit_cache import transit_cache
+from app.core.dependencies import get_current_user, get_current_user_readonly
 from pydantic import BaseModel
 
 router = APIRouter()
 
+def _service_busy(error: AstrologyServiceBusyError) -> HTTPException:
+    """503 for callers while the astrology service turns work away, with its Retry-After."""
+    headers = {"Retry-After": str(math.ceil(error.retry_after))} if error.retry_after is not None else None
+    return HTTPException(status_code=503, detail="Astrology service is busy", headers=headers)
+
 class BirthData(BaseModel):
     birth_date: str
     birth_time: str
     latitude: float
     longitude: float
     timezone: str
+    city: str
+    state: str
+    country: str
 
 @router.post("/")
 async def create_chart(birth_data: BirthData, current_user: User = Depends(get_current_user)):
     """Create a new birth chart for the current user."""
-    chart_data = await create_birth_chart(birth_data.dict())
+    try:
+        birth_date = datetime.strptime(birth_data.birth_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="birth_date must be formatted as YYYY-MM-DD")
+
+    # The place names are stored with the chart but play no part in calculating it
+    try:
+        chart_data = await chart_cache.get_or_create(
+            birth_data.dict(exclude={"city", "state", "country"}), create_birth_chart
+        )
+    except AstrologyServiceBusyError as e:
+        raise _service_busy(e)
     if not chart_data:
         raise HTTPException(status_code=500, detail="Failed to create birth chart")
     
     birth_chart = BirthChart(
-        user_id=current_user.id,
-        birth_details=birth_data.dict(),
-        chart_data=chart_data
+        user=current_user,
+        birth_data=StoredBirthData(
+            date=birth_date,
+            time=birth_data.birth_time,
+            city=birth_data.city,
+            state=birth_data.state,
+            country=birth_data.country,
+            latitude=birth_data.latitude,
+            longitude=birth_data.longitude,
+            timezone=birth_data.timezone
+        ),
+        chart_data=ChartData.from_service(chart_data)
     )
     birth_chart.save()
     
-    return birth_chart
+    return birth_chart.to_dict()
+
+@router.get("/cache/stats")
+async def get_chart_cache_stats(current_user: User = Depends(get_current_user_readonly)):
+    """Hit/miss counters for the chart result cache."""
+    return chart_cache.stats()
+
+@router.get("/transits/cache/stats")
+async def get_transit_cache_stats(current_user: User = Depends(get_current_user_readonly)):
+    """Hit/miss counters for the daily transit cache."""
+    return transit_cache.stats()
+
+@router.get("/client/stats")
+async def get_astrology_client_stats(current_user: User = Depends(get_current_user_readonly)):
+    """Coalescing, micro-batching and circuit breaker counters for calls to the astrology service."""
+    return {
+        "coalescing": single_flight.stats(),
+        "batching": chart_batcher.stats(),
+        "breaker": breaker.stats(),
+        "requests": request_metrics
+    }
+
+# Declared before /{chart_id}, which would otherwise match it
+@router.get("/user")
+async def get_user_charts(current_user: User = Depends(get_current_user_readonly)):
+    """Retrieve all birth charts for the current user."""
+    birth_charts = BirthChart.objects(user=current_user.id)
+    return [birth_chart.to_dict() for birth_chart in birth_charts]
 
 @router.get("/{chart_id}")
-async def get_chart(chart_id: str, current_user: User = Depends(get_current_user)):
+async def get_chart(chart_id: str, current_user: User = Depends(get_current_user_readonly)):
     """Retrieve a specific birth chart for the current user."""
-    birth_chart = BirthChart.objects(id=chart_id, user_id=current_user.id).first()
+    birth_chart = BirthChart.objects(id=chart_id, user=current_user.id).first()
     if not birth_chart:
         raise HTTPException(status_code=404, detail="Birth chart not found")
-    return birth_chart
+    return birth_chart.to_dict()
 
-@router.get("/user")
-async def get_user_charts(current_user: User = Depends(get_current_user)):
-    """Retrieve all birth charts for the current user."""
-    birth_charts = BirthChart.objects(user_id=current_user.id)
-    return list(birth_charts)
+@router.delete("/{chart_id}")
+async def delete_chart(chart_id: str, current_user: User = Depends(get_current_user)):
+    """Delete a birth chart of the current user along with its cached transits."""
+    birth_chart = BirthChart.objects(id=chart_id, user=current_user.id).first()
+    if not birth_chart:
+        raise HTTPException(status_code=404, detail="Birth chart not found")
+    birth_chart.delete()
+    transit_cache.invalidate(chart_id)
+    return {"message": "Birth chart deleted successfully"}
 
 @router.get("/{chart_id}/transits")
-async def get_transits(chart_id: str, current_user: User = Depends(get_current_user)):
-    """Retrieve daily transits for a specific birth chart."""
-    birth_chart = BirthChart.objects(id=chart_id, user_id=current_user.id).first()
+async def get_transits(chart_id: str, current_user: User = Depends(get_current_user_readonly)):
+    """Retrieve daily transits for a specific birth chart, cached until the chart's local midnight."""
+    birth_chart = BirthChart.objects(id=chart_id, user=current_user.id).first()
     if not birth_chart:
         raise HTTPException(status_code=404, detail="Birth chart not found")
     
-    transits_data = await get_daily_transits(chart_id)
+    try:
+        transits_data = await transit_cache.get_or_fetch(
+            chart_id,
+            birth_chart.birth_data.timezone if birth_chart.birth_data else None,
+            lambda at: get_daily_transits(chart_id, birth_chart.chart_data.planet_positions, at)
+        )
+    except AstrologyServiceBusyError as e:
+        raise _service_busy(e)
     if not transits_data:
         raise HTTPException(status_code=500, detail="Failed to get daily transits")
         
@@ -4,7 +4,7 @@ from pydantic import BaseModel
 from datetime import datetime
 from app.models.user import User
 from app.models.chat import ChatSession, Message
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_current_user_readonly
 from app.services.chat_service import ChatService
 
 router = APIRouter()
@@ -59,7 +59,7 @@ async def create_chat_session(
 @router.get("/sessions", response_model=List[SessionResponse])
 async def list_chat_sessions(
     active_only: bool = True,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_readonly)
 ):
     """List all chat sessions for the current user."""
     sessions = await ChatService.get_user_sessions(current_user, active_only)
@@ -119,7 +119,7 @@ async def send_message(
 @router.get("/sessions/{session_id}/messages", response_model=List[MessageResponse])
 async def get_messages(
     session_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user_readonly)
 ):
     """Get all messages in a chat session."""
     session = await ChatService.get_session(session_id, current_user)
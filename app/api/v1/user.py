@@ -1,11 +1,42 @@
-from fastapi import APIRouter, Depends
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
 from app.models.user import User
 from app.core.dependencies import get_current_user
+from app.services.principal_cache import principal_cache
 
 router = APIRouter()
 
+class ProfileUpdate(BaseModel):
+    name: Optional[str] = None
+    avatarUrl: Optional[str] = None
+    preferences: Optional[dict] = None
+
+@router.patch("/profile")
+async def update_profile(profile: ProfileUpdate, current_user: User = Depends(get_current_user)):
+    """Update the current user's name, avatar or content preferences."""
+    changes = profile.dict(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No profile fields to update")
+    required = [field for field, value in changes.items() if value is None and User._fields[field].required]
+    if required:
+        raise HTTPException(status_code=422, detail=f"Cannot clear required fields: {', '.join(required)}")
+    # update_one skips document validation; null clears an optional field instead of storing None
+    update = {}
+    for field, value in changes.items():
+        if value is None:
+            update[f"unset__{field}"] = True
+        else:
+            update[f"set__{field}"] = value
+    update["set__updated_at"] = datetime.utcnow()
+    User.objects(id=current_user.id).update_one(**update)
+    principal_cache.invalidate(current_user.id)
+    return {"message": "Profile successfully updated"}
+
 @router.delete("/account")
 async def delete_account(current_user: User = Depends(get_current_user)):
     """Delete the current user's account."""
     current_user.delete()
-    return {"message": "Account successfully deleted"}
\ No newline at end of file
+    principal_cache.invalidate(current_user.id)
+    return {"message": "Account successfully deleted"}
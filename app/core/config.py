@@ -16,6 +16,15 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
 
+    # Password hashing: bcrypt cost factor and the threads hashing runs on
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+
+    # Authenticated user cache; read-only routes may trust signed token claims instead
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    PRINCIPAL_TRUST_JWT_CLAIMS: bool = False
+
     # External API keys
     GOOGLE_MAPS_API_KEY: str = Field(..., alias="GOOGLE_CLIENT_SECRET")
     GOOGLE_AI_API_KEY: str = Field(..., alias="GEMINI_API_KEY")
@@ -23,6 +32,40 @@ class Settings(BaseSettings):
     # Service URLs
     ASTROLOGY_SERVICE_URL: str
 
+    # Chart cache settings
+    CHART_CACHE_SIZE: int = 1024
+    CHART_CACHE_TTL_SECONDS: int = 30 * 24 * 60 * 60
+    CHART_CACHE_COORDINATE_PRECISION: int = 4
+
+    # Daily transit cache: entries expire at the chart's next local midnight
+    TRANSIT_CACHE_SIZE: int = 4096
+    TRANSIT_CACHE_MONGO_ENABLED: bool = True
+
+    # Astrology service wire format: "json" or "msgpack"
+    ASTROLOGY_WIRE_FORMAT: str = "json"
+
+    # Astrology service HTTP client: keep-alive pool, HTTP/2 and timeouts
+    ASTROLOGY_MAX_CONNECTIONS: int = 100
+    ASTROLOGY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    ASTROLOGY_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    ASTROLOGY_HTTP2: bool = False
+    ASTROLOGY_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    ASTROLOGY_READ_TIMEOUT_SECONDS: float = 30.0
+    ASTROLOGY_WRITE_TIMEOUT_SECONDS: float = 10.0
+    ASTROLOGY_POOL_TIMEOUT_SECONDS: float = 5.0
+
+    # Micro-batching of chart requests into the astrology service batch endpoint
+    ASTROLOGY_BATCH_ENABLED: bool = False
+    ASTROLOGY_BATCH_WINDOW_MS: float = 5.0
+    ASTROLOGY_BATCH_MAX_SIZE: int = 50
+
+    # Astrology service circuit breaker, latency budget and hedged retries
+    ASTROLOGY_BREAKER_FAILURE_THRESHOLD: int = 5
+    ASTROLOGY_BREAKER_RESET_SECONDS: float = 30.0
+    ASTROLOGY_LATENCY_BUDGET_SECONDS: float = 10.0
+    ASTROLOGY_HEDGE_ENABLED: bool = False
+    ASTROLOGY_HEDGE_DELAY_MS: float = 250.0
+
     # CORS settings
     FRONTEND_CORS_ORIGINS: List[AnyHttpUrl] = Field(..., alias="CORS_ORIGIN")
 
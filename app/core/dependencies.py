@@ -1,27 +1,47 @@
+from bson import ObjectId
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.models.user import User
 from app.core.config import get_settings
+from app.services.principal_cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def _decode_token(token: str) -> dict:
     try:
         settings = get_settings()
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        if payload.get("sub") is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    
-    user = User.objects(id=user_id).first()
+    return payload
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+    """The user a token belongs to, projected to the fields handlers read and cached per token."""
+    return _load_user(_decode_token(token))
+
+def _load_user(payload: dict) -> User:
+    user = principal_cache.get_user(payload["sub"], payload.get("iat"))
     if user is None:
         raise credentials_exception
     return user
+
+async def get_current_user_readonly(token: str = Depends(oauth2_scheme)) -> User:
+    """Like ``get_current_user``, for routes that only read the user's id and email.
+
+    With PRINCIPAL_TRUST_JWT_CLAIMS the user is built from the signed token
+    claims without touching Mongo, so a deleted account keeps access until
+    its token expires. The result must never be saved.
+    """
+    payload = _decode_token(token)
+    if get_settings().PRINCIPAL_TRUST_JWT_CLAIMS and payload.get("email"):
+        return User(id=ObjectId(payload["sub"]), email=payload["email"], name=payload.get("name"))
+    return _load_user(payload)
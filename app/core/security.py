@@ -1,12 +1,26 @@
+import asyncio
+import hashlib
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import jwt
+from typing import Optional, Tuple
+from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import get_settings
 
 settings = get_settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes with any other cost than PASSWORD_HASH_ROUNDS are reported as needing an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_HASH_ROUNDS
+)
+
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_hash_slots: Optional[asyncio.Semaphore] = None
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
@@ -16,20 +30,68 @@ def get_password_hash(password: str) -> str:
     """Generate a password hash."""
     return pwd_context.hash(password)
 
-def create_access_token(subject: str, expires_delta: Optional[timedelta] = None) -> str:
-    """Create a new access token."""
+async def _run_hashing(func, *args):
+    """Run a bcrypt call on the hashing threads, at most PASSWORD_HASH_WORKERS at a time.
+
+    Callers beyond the cap wait on a semaphore rather than in the executor
+    queue, so a request cancelled while waiting never starts its hash.
+    """
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+    async with _hash_slots:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+
+async def hash_password(password: str) -> str:
+    """Generate a password hash without blocking the event loop."""
+    return await _run_hashing(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password without blocking the event loop.
+
+    Returns whether it matched and, when the stored hash uses an outdated
+    cost factor, a replacement hash to store (otherwise None).
+    """
+    return await _run_hashing(pwd_context.verify_and_update, plain_password, hashed_password)
+
+def create_access_token(subject: str, expires_delta: Optional[timedelta] = None, claims: Optional[dict] = None) -> str:
+    """Create a new access token.
+
+    ``iat`` keys the principal cache; extra ``claims`` (email, name) let
+    read-only routes skip the user lookup when PRINCIPAL_TRUST_JWT_CLAIMS is set.
+    """
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "iat": now, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
-def create_refresh_token(subject: str) -> str:
-    """Create a new refresh token."""
+def create_refresh_token(subject: str) -> Tuple[str, datetime]:
+    """Create a new refresh token; returns it with its expiry.
+
+    ``jti`` makes every token unique, so rotating always replaces the stored hash.
+    """
     expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {"exp": expire, "sub": str(subject), "jti": secrets.token_urlsafe(16)}
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
-    return encoded_jwt
+    return encoded_jwt, expire
+
+def hash_refresh_token(token: str) -> str:
+    """SHA-256 of a refresh token, as stored and indexed on the user.
+
+    Refresh tokens are long and random, so an unsalted fast hash is enough
+    and keeps the lookup a plain index match.
+    """
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def decode_refresh_token_subject(token: str) -> Optional[str]:
+    """The user id a refresh token was issued to, or None if it is invalid or expired."""
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
@@ -1,9 +1,11 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1 import auth, user, chart, chat
 from app.core.config import settings
 from app.core.middleware import ErrorHandlingMiddleware
 from app.database import connect_to_mongodb, close_mongodb_connection
+from app.services import astrology_client
 import logging
 
 # Configure logging
@@ -13,10 +15,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect to MongoDB and open the astrology service connection pool for the app's lifetime."""
+    logger.info("Connecting to MongoDB...")
+    connect_to_mongodb()
+    logger.info("Connected to MongoDB successfully")
+    await astrology_client.start_client()
+    try:
+        yield
+    finally:
+        await astrology_client.close_client()
+        logger.info("Closing MongoDB connection...")
+        close_mongodb_connection()
+        logger.info("MongoDB connection closed")
+
 app = FastAPI(
     title="Astrology Backend API",
     description="Backend API for the astrology application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add middleware
@@ -35,19 +53,6 @@ app.include_router(user.router, prefix="/api/v1/user", tags=["user"])
 app.include_router(chart.router, prefix="/api/v1/chart", tags=["chart"])
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["chat"])
 
-@app.on_event("startup")
-async def startup_event():
-    """Connect to MongoDB on startup."""
-    logger.info("Connecting to MongoDB...")
-    connect_to_mongodb()
-    logger.info("Connected to MongoDB successfully")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Close MongoDB connection on shutdown."""
-    logger.info("Closing MongoDB connection...")
-    close_mongodb_connection()
-    logger.info("MongoDB connection closed")
 app.include_router(chat.router, prefix="/api/v1/chat", tags=["chat"])
 
 @app.get("/")
@@ -0,0 +1,68 @@
+"""Convert stored birth charts from nested-dict chart data to the packed version 2 layout.
+
+    python -m app.migrate_chart_storage [--dry-run] [--batch-size 500]
+
+Documents whose planets or houses don't fit the packed layout are left
+untouched and counted as skipped.
+"""
+import argparse
+from typing import Dict, Optional
+from bson import Binary
+from mongoengine import connect, disconnect
+from pymongo import UpdateOne
+from app.core.config import get_settings
+from app.models.birthchart import BirthChart, CHART_SCHEMA_VERSION, pack_houses, pack_positions
+
+def compact_chart_data(chart_data: Dict) -> Optional[Dict]:
+    """Version 2 form of a raw version 1 ``chart_data`` subdocument, or None if it can't be packed."""
+    houses = chart_data.get('houses') or {}
+    try:
+        positions = pack_positions(chart_data.get('planets') or {})
+        cusps = pack_houses(houses) if houses else None
+    except (ValueError, TypeError):
+        return None
+    compact = {key: value for key, value in chart_data.items() if key not in ('planets', 'houses')}
+    compact['schema_version'] = CHART_SCHEMA_VERSION
+    compact['positions'] = Binary(positions)
+    if cusps is not None:
+        compact['house_system'] = houses.get('system')
+        compact['cusps'] = Binary(cusps)
+    return compact
+
+def migrate(batch_size: int = 500, dry_run: bool = False) -> Dict[str, int]:
+    collection = BirthChart._get_collection()
+    counts = {'migrated': 0, 'skipped': 0}
+    operations = []
+    cursor = collection.find(
+        {'chart_data.schema_version': {'$ne': CHART_SCHEMA_VERSION}},
+        {'chart_data': 1}
+    ).batch_size(batch_size)
+    for document in cursor:
+        compact = compact_chart_data(document.get('chart_data') or {})
+        if compact is None:
+            counts['skipped'] += 1
+            continue
+        counts['migrated'] += 1
+        operations.append(UpdateOne({'_id': document['_id']}, {'$set': {'chart_data': compact}}))
+        if len(operations) >= batch_size:
+            if not dry_run:
+                collection.bulk_write(operations, ordered=False)
+            operations = []
+    if operations and not dry_run:
+        collection.bulk_write(operations, ordered=False)
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="count documents without writing")
+    args = parser.parse_args()
+
+    disconnect()
+    connect(host=get_settings().MONGODB_URI)
+    counts = migrate(args.batch_size, args.dry_run)
+    action = "Would migrate" if args.dry_run else "Migrated"
+    print(f"{action} {counts['migrated']} birth charts, skipped {counts['skipped']}")
+
+if __name__ == "__main__":
+    main()
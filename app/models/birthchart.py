@@ -1,5 +1,122 @@
+import logging
+import math
+import struct
 from datetime import datetime
-from mongoengine import Document, EmbeddedDocument, ReferenceField, DictField, DateTimeField, StringField, FloatField, EmbeddedDocumentField
+from typing import Dict, List
+from mongoengine import (
+    Document, EmbeddedDocument, ReferenceField, DictField, DateTimeField, StringField, FloatField,
+    EmbeddedDocumentField, IntField, BinaryField, DynamicField
+)
+
+logger = logging.getLogger(__name__)
+
+# Version 1 kept planets and houses as nested dicts; version 2 packs them into float64 arrays
+CHART_SCHEMA_VERSION = 2
+
+PLANET_ORDER = ('sun', 'moon', 'mercury', 'venus', 'mars', 'jupiter', 'saturn', 'uranus', 'neptune', 'pluto')
+POSITION_FIELDS = (
+    'ra', 'dec', 'distance', 'latitude', 'longitude', 'sign', 'sign_degree',
+    'sidereal_longitude', 'sidereal_sign', 'sidereal_sign_degree', 'nakshatra', 'pada'
+)
+HOUSE_COUNT = 12
+
+SIGNS = (
+    'Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
+    'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
+)
+NAKSHATRAS = (
+    'Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra', 'Punarvasu',
+    'Pushya', 'Ashlesha', 'Magha', 'Purva Phalguni', 'Uttara Phalguni', 'Hasta',
+    'Chitra', 'Swati', 'Vishakha', 'Anuradha', 'Jyeshtha', 'Mula', 'Purva Ashadha',
+    'Uttara Ashadha', 'Shravana', 'Dhanishta', 'Shatabhisha', 'Purva Bhadrapada',
+    'Uttara Bhadrapada', 'Revati'
+)
+# Text fields are packed as their index in these lists
+LABELS = {'sign': SIGNS, 'sidereal_sign': SIGNS, 'nakshatra': NAKSHATRAS}
+INTEGER_FIELDS = ('pada',)
+
+def _pack(values: List[float]) -> bytes:
+    return struct.pack(f'<{len(values)}d', *values)
+
+def _unpack(data: bytes) -> tuple:
+    return struct.unpack(f'<{len(data) // 8}d', data)
+
+def pack_positions(planets: Dict[str, Dict], ignore_unknown: bool = False) -> bytes:
+    """Planet positions as a ``(PLANET_ORDER, POSITION_FIELDS)`` float64 array; NaN marks missing values.
+
+    Raises ValueError for bodies, fields or labels the layout cannot hold,
+    so nothing is silently dropped. With ``ignore_unknown`` unknown bodies
+    and fields are logged and left out instead.
+    """
+    unknown = set(planets) - set(PLANET_ORDER)
+    if unknown:
+        if not ignore_unknown:
+            raise ValueError(f"Cannot pack bodies: {', '.join(sorted(unknown))}")
+        logger.warning(f"Ignoring bodies the packed layout cannot hold: {', '.join(sorted(unknown))}")
+    values = []
+    for name in PLANET_ORDER:
+        position = planets.get(name) or {}
+        unknown = set(position) - set(POSITION_FIELDS)
+        if unknown:
+            if not ignore_unknown:
+                raise ValueError(f"Cannot pack {name} fields: {', '.join(sorted(unknown))}")
+            logger.warning(f"Ignoring {name} fields the packed layout cannot hold: {', '.join(sorted(unknown))}")
+        for field in POSITION_FIELDS:
+            value = position.get(field)
+            if value is None:
+                values.append(math.nan)
+            elif field in LABELS:
+                values.append(float(LABELS[field].index(value)))
+            else:
+                values.append(float(value))
+    return _pack(values)
+
+def unpack_positions(data: bytes) -> Dict[str, Dict]:
+    values = _unpack(data)
+    width = len(POSITION_FIELDS)
+    planets = {}
+    for i, name in enumerate(PLANET_ORDER):
+        position = {}
+        for field, value in zip(POSITION_FIELDS, values[i * width:(i + 1) * width]):
+            if math.isnan(value):
+                continue
+            if field in LABELS:
+                position[field] = LABELS[field][int(value)]
+            elif field in INTEGER_FIELDS:
+                position[field] = int(value)
+            else:
+                position[field] = value
+        if position:
+            planets[name] = position
+    return planets
+
+def pack_houses(houses: Dict) -> bytes:
+    """Ascendant, MC, 12 cusps and 12 midpoints as float64; NaN where the house system has none."""
+    unknown = set(houses) - {'system', 'ascendant', 'mc', 'cusps', 'midpoints'}
+    if unknown:
+        raise ValueError(f"Cannot pack house fields: {', '.join(sorted(unknown))}")
+    values = [houses.get('ascendant', math.nan), houses.get('mc', math.nan)]
+    for key in ('cusps', 'midpoints'):
+        points = houses.get(key) or {}
+        if set(points) - {str(house) for house in range(1, HOUSE_COUNT + 1)}:
+            raise ValueError(f"Cannot pack house {key}: {sorted(points)}")
+        values += [points.get(str(house), math.nan) for house in range(1, HOUSE_COUNT + 1)]
+    return _pack([math.nan if value is None else float(value) for value in values])
+
+def unpack_houses(data: bytes, system: str) -> Dict:
+    values = _unpack(data)
+    houses = {'system': system}
+    for key, value in (('ascendant', values[0]), ('mc', values[1])):
+        if not math.isnan(value):
+            houses[key] = value
+    for offset, key in ((2, 'cusps'), (2 + HOUSE_COUNT, 'midpoints')):
+        points = {
+            str(house + 1): values[offset + house]
+            for house in range(HOUSE_COUNT) if not math.isnan(values[offset + house])
+        }
+        if points:
+            houses[key] = points
+    return houses
 
 class BirthData(EmbeddedDocument):
     date = DateTimeField(required=True)
@@ -12,12 +129,58 @@ class BirthData(EmbeddedDocument):
     timezone = StringField(required=True)
 
 class ChartData(EmbeddedDocument):
+    schema_version = IntField(default=1)
     ascendant = StringField(required=True)
     sun_sign = StringField(required=True)
     moon_sign = StringField(required=True)
-    planets = DictField(required=True)
-    houses = DictField(required=True)
-    aspects = DictField(required=True)
+    # Version 1
+    planets = DictField()
+    houses = DictField()
+    # Version 2: packed float arrays, see pack_positions / pack_houses
+    positions = BinaryField()
+    house_system = StringField()
+    cusps = BinaryField()
+    aspects = DynamicField()
+
+    @classmethod
+    def from_service(cls, chart: Dict) -> 'ChartData':
+        """Compact chart data from an astrology service chart result."""
+        houses = chart.get('houses') or {}
+        return cls(
+            schema_version=CHART_SCHEMA_VERSION,
+            ascendant=chart['ascendant'],
+            sun_sign=chart['sun_sign'],
+            moon_sign=chart['moon_sign'],
+            # Fields added to the service's output are dropped until the layout holds them
+            positions=pack_positions(chart.get('planet_positions') or {}, ignore_unknown=True),
+            house_system=houses.get('system'),
+            cusps=pack_houses(houses) if houses else None,
+            aspects=chart.get('aspects') or []
+        )
+
+    @property
+    def planet_positions(self) -> Dict[str, Dict]:
+        """Planet positions as nested dicts, unpacked on access."""
+        if self.schema_version < 2:
+            return self.planets
+        return unpack_positions(self.positions) if self.positions else {}
+
+    @property
+    def house_data(self) -> Dict:
+        """Houses as a dict with ``cusps`` (and ``midpoints``) keyed by house number, unpacked on access."""
+        if self.schema_version < 2:
+            return self.houses
+        return unpack_houses(self.cusps, self.house_system) if self.cusps else {}
+
+    def to_dict(self) -> Dict:
+        return {
+            'ascendant': self.ascendant,
+            'sun_sign': self.sun_sign,
+            'moon_sign': self.moon_sign,
+            'planets': self.planet_positions,
+            'houses': self.house_data,
+            'aspects': self.aspects
+        }
 
 class BirthChart(Document):
     user = ReferenceField('User', required=True)
@@ -32,3 +195,12 @@ class BirthChart(Document):
             'created_at'
         ]
     }
+
+    def to_dict(self) -> Dict:
+        """The chart with its chart data expanded to nested dicts."""
+        return {
+            'id': str(self.id),
+            'birth_data': self.birth_data.to_mongo().to_dict() if self.birth_data else None,
+            'chart_data': self.chart_data.to_dict() if self.chart_data else None,
+            'created_at': self.created_at
+        }
@@ -0,0 +1,16 @@
+from datetime import datetime
+from mongoengine import Document, StringField, DictField, DateTimeField
+
+class ChartCacheEntry(Document):
+    """A computed chart stored under the hash of its normalized birth data."""
+    key = StringField(required=True, unique=True)
+    chart_data = DictField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    expires_at = DateTimeField(required=True)
+
+    meta = {
+        'collection': 'chart_cache',
+        'indexes': [
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
@@ -0,0 +1,18 @@
+from datetime import datetime
+from mongoengine import Document, StringField, DictField, DateTimeField
+
+class TransitCacheEntry(Document):
+    """Daily transits of a birth chart for one local date, kept until the chart's next local midnight."""
+    chart_id = StringField(required=True)
+    local_date = StringField(required=True)
+    transits = DictField(required=True)
+    created_at = DateTimeField(default=datetime.utcnow)
+    expires_at = DateTimeField(required=True)
+
+    meta = {
+        'collection': 'transit_cache',
+        'indexes': [
+            {'fields': ['chart_id', 'local_date'], 'unique': True},
+            {'fields': ['expires_at'], 'expireAfterSeconds': 0}
+        ]
+    }
@@ -10,7 +10,10 @@ class User(Document):
     avatarUrl = StringField()
     chartId = ObjectIdField()
     preferences = DictField(default={})  # User preferences for content generation
+    # Plaintext token from before refresh tokens were hashed; cleared on the next login or refresh
     refresh_token = StringField()
+    refresh_token_hash = StringField()
+    refresh_token_expires_at = DateTimeField()
     is_active = BooleanField(default=True)
     last_login = DateTimeField()
     created_at = DateTimeField(default=datetime.utcnow)
@@ -20,7 +23,7 @@ class User(Document):
         'collection': 'users',
         'indexes': [
             'email',
-            'refresh_token',
+            {'fields': ['refresh_token_hash'], 'sparse': True},
             ('email', 'is_active'),
         ]
     }
@@ -1,10 +1,20 @@
+import asyncio
+import copy
+import hashlib
 import httpx
 import logging
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import msgpack
+import orjson
 from app.core.config import get_settings
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
 class AstrologyServiceError(Exception):
     """Base exception for Astrology Service errors."""
     pass
@@ -20,50 +30,485 @@ class AstrologyServiceClientError(AstrologyServiceError):
         self.detail = detail
         super().__init__(f"Astrology Service returned {status_code}: {detail}")
 
+class AstrologyServiceInvalidRequestError(AstrologyServiceClientError):
+    """Exception for a 4xx rejecting the request body itself (400, 413, 422)."""
+    pass
+
 class AstrologyServiceServerError(AstrologyServiceError):
     """Exception for 5xx server errors from the Astrology Service."""
     pass
 
+class AstrologyServiceBusyError(AstrologyServiceError):
+    """Exception for the Astrology Service turning work away (queue full or still starting).
 
-async def create_birth_chart(birth_data: dict) -> dict:
-    """Call the Astrology Service to create a new birth chart."""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{settings.ASTROLOGY_SERVICE_URL}/chart",
-                json=birth_data,
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            if 400 <= e.response.status_code < 500:
-                logger.warning(f"Client error from astrology service: {e.response.status_code} {e.response.text}")
-                raise AstrologyServiceClientError(e.response.status_code, e.response.text) from e
-            else:
-                logger.error(f"Server error from astrology service: {e.response.status_code} {e.response.text}")
-                raise AstrologyServiceServerError("Astrology service failed") from e
-        except (httpx.RequestError, httpx.TimeoutException) as e:
-            logger.error(f"Connection error calling astrology service: {e}")
-            raise AstrologyServiceConnectionError("Could not connect to astrology service") from e
-
-async def get_daily_transits(birth_chart_id: str) -> dict:
-    """Call the Astrology Service to get daily transits for a birth chart."""
-    async with httpx.AsyncClient() as client:
+    ``retry_after`` holds the seconds from the service's Retry-After header, if any.
+    """
+    def __init__(self, status_code: int, retry_after: Optional[float]):
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(f"Astrology Service is busy ({status_code}), retry after {retry_after}s")
+
+INVALID_REQUEST_STATUS_CODES = (400, 413, 422)
+# Backpressure (429) and "Service is starting" (503) answers, which say nothing about the request
+BUSY_STATUS_CODES = (429, 503)
+
+_client: Optional[httpx.AsyncClient] = None
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=settings.ASTROLOGY_SERVICE_URL,
+        http2=settings.ASTROLOGY_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.ASTROLOGY_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.ASTROLOGY_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.ASTROLOGY_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        timeout=httpx.Timeout(
+            connect=settings.ASTROLOGY_CONNECT_TIMEOUT_SECONDS,
+            read=settings.ASTROLOGY_READ_TIMEOUT_SECONDS,
+            write=settings.ASTROLOGY_WRITE_TIMEOUT_SECONDS,
+            pool=settings.ASTROLOGY_POOL_TIMEOUT_SECONDS
+        )
+    )
+
+async def start_client():
+    """Open the shared connection pool; called from the application lifespan."""
+    global _client
+    if _client is None:
+        _client = _create_client()
+
+async def close_client():
+    """Close the shared connection pool and its keep-alive connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_client() -> httpx.AsyncClient:
+    """The shared client, created on first use outside the application lifespan (scripts, tests)."""
+    global _client
+    if _client is None:
+        _client = _create_client()
+    return _client
+
+def _request_headers() -> dict:
+    """Ask for MessagePack when configured; the service falls back to JSON otherwise."""
+    if settings.ASTROLOGY_WIRE_FORMAT == "msgpack":
+        accept = f"{MSGPACK_MEDIA_TYPE}, application/json;q=0.9"
+    else:
+        accept = "application/json"
+    return {"Accept": accept, "Content-Type": "application/json"}
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one upstream request.
+
+    The first caller for a key starts the request as a task; callers that
+    arrive while it is in flight await the same task and get its result (a
+    copy) or its exception. The task is shielded, so a caller that goes away
+    does not cancel the request for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.requests = 0
+        self.coalesced = 0
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return copy.deepcopy(await asyncio.shield(task))
+        self.requests += 1
+        task = asyncio.ensure_future(call())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._in_flight)
+        }
+
+single_flight = SingleFlight()
+
+class MicroBatcher:
+    """Collects calls for a short window (or until ``max_size``) and sends them as one batch.
+
+    ``send`` takes the list of items and returns one result per item, in
+    order; a result that is an exception is raised to that item's caller
+    only. When ``send`` itself raises one of ``split_on`` for several items,
+    the batch is halved and each half sent again, down to single items, so
+    an item that breaks the whole request fails only its own caller. Other
+    exceptions from ``send`` go to every caller.
+    """
+
+    def __init__(self, send: Callable[[List[Any]], Awaitable[List[Any]]], window_seconds: float, max_size: int,
+                 split_on: Tuple[type, ...] = ()):
+        self.send = send
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self.split_on = split_on
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._sending = set()
+        self.batches = 0
+        self.items = 0
+        self.splits = 0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._send(batch))
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: List[Tuple[Any, asyncio.Future]]):
+        self.batches += 1
+        self.items += len(batch)
+        await self._deliver(batch)
+
+    async def _deliver(self, batch: List[Tuple[Any, asyncio.Future]]):
         try:
-            response = await client.get(
-                f"{settings.ASTROLOGY_SERVICE_URL}/chart/{birth_chart_id}/transits",
-                timeout=30.0
-            )
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            if 400 <= e.response.status_code < 500:
-                logger.warning(f"Client error getting daily transits: {e.response.status_code} {e.response.text}")
-                raise AstrologyServiceClientError(e.response.status_code, e.response.text) from e
+            results = await self.send([item for item, _ in batch])
+        except self.split_on as e:
+            if len(batch) == 1:
+                self._fail(batch, e)
+                return
+            self.splits += 1
+            middle = len(batch) // 2
+            await asyncio.gather(self._deliver(batch[:middle]), self._deliver(batch[middle:]))
+            return
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
             else:
-                logger.error(f"Server error getting daily transits: {e.response.status_code} {e.response.text}")
-                raise AstrologyServiceServerError("Astrology service failed") from e
-        except (httpx.RequestError, httpx.TimeoutException) as e:
-            logger.error(f"Connection error getting daily transits: {e}")
-            raise AstrologyServiceConnectionError("Could not connect to astrology service") from e
\ No newline at end of file
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[Any, asyncio.Future]], error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': settings.ASTROLOGY_BATCH_ENABLED,
+            'batches': self.batches,
+            'items': self.items,
+            'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+            'splits': self.splits,
+            'pending': len(self._pending)
+        }
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker in front of the astrology service.
+
+    After ``failure_threshold`` consecutive failures (5xx, connection errors,
+    exceeded latency budget) the breaker opens and calls fail fast with
+    ``AstrologyServiceConnectionError`` instead of waiting on a struggling
+    service. Once ``reset_seconds`` have passed it lets a single probe
+    through (half-open): success closes it, failure opens it again. 4xx
+    responses mean the service is answering and count as successes, except
+    a 429 (full queue), which counts as neither.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self._opened_at = 0.0
+        self._changed_at = time.time()
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; counts the rejections."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_seconds:
+                self.rejected += 1
+                return False
+            self._transition(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                self.rejected += 1
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self):
+        self._probing = False
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self):
+        self._probing = False
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self._opened_at = time.monotonic()
+            self._transition(self.OPEN)
+
+    def release(self):
+        """Give up a probe slot without an outcome (the call was cancelled)."""
+        self._probing = False
+
+    def _transition(self, state: str):
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"Astrology service circuit breaker {key} ({self.consecutive_failures} consecutive failures)")
+        self.state = state
+        self._changed_at = time.time()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'state': self.state,
+            'consecutive_failures': self.consecutive_failures,
+            'rejected': self.rejected,
+            'transitions': dict(self.transitions),
+            'state_since': self._changed_at
+        }
+
+breaker = CircuitBreaker(settings.ASTROLOGY_BREAKER_FAILURE_THRESHOLD, settings.ASTROLOGY_BREAKER_RESET_SECONDS)
+request_metrics = {'budget_exceeded': 0, 'hedged': 0, 'hedge_wins': 0}
+
+async def _hedged(call: Callable[[], Awaitable[Any]], delay_seconds: float) -> Any:
+    """Start a second attempt if the first hasn't answered after ``delay_seconds``; first useful answer wins.
+
+    Only for idempotent requests. A 4xx is a definite answer; if both
+    attempts fail otherwise the later error is raised. The loser is cancelled.
+    """
+    attempts = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(attempts, timeout=delay_seconds)
+        if not done:
+            request_metrics['hedged'] += 1
+            attempts.append(asyncio.ensure_future(call()))
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for attempt in done:
+                error = attempt.exception()
+                if error is None or isinstance(error, AstrologyServiceClientError):
+                    if attempt is not attempts[0]:
+                        request_metrics['hedge_wins'] += 1
+                    return attempt.result()
+        raise error
+    finally:
+        for attempt in attempts:
+            if not attempt.done():
+                attempt.cancel()
+
+async def _guarded(call: Callable[[], Awaitable[Any]], idempotent: bool = False,
+                   record_server_errors: bool = True) -> Any:
+    """Run an upstream call behind the circuit breaker and within the latency budget.
+
+    With ``record_server_errors=False`` a 5xx is not counted against the
+    breaker, for calls whose failure may be caused by their input.
+    """
+    if not breaker.allow():
+        raise AstrologyServiceConnectionError("Astrology service circuit breaker is open")
+    if idempotent and settings.ASTROLOGY_HEDGE_ENABLED:
+        attempt = _hedged(call, settings.ASTROLOGY_HEDGE_DELAY_MS / 1000.0)
+    else:
+        attempt = call()
+    try:
+        result = await asyncio.wait_for(attempt, settings.ASTROLOGY_LATENCY_BUDGET_SECONDS)
+    except asyncio.TimeoutError as e:
+        request_metrics['budget_exceeded'] += 1
+        breaker.record_failure()
+        logger.error(f"Astrology service exceeded the {settings.ASTROLOGY_LATENCY_BUDGET_SECONDS}s latency budget")
+        raise AstrologyServiceConnectionError("Astrology service timed out") from e
+    except AstrologyServiceConnectionError:
+        breaker.record_failure()
+        raise
+    except AstrologyServiceServerError:
+        if record_server_errors:
+            breaker.record_failure()
+        else:
+            breaker.release()
+        raise
+    except AstrologyServiceClientError:
+        breaker.record_success()
+        raise
+    except AstrologyServiceBusyError as e:
+        # A service that is still starting counts as down; a full queue is answering
+        if e.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.release()
+        raise
+    except BaseException:
+        breaker.release()
+        raise
+    breaker.record_success()
+    return result
+
+def _flight_key(path: str, payload: Any) -> str:
+    """Key for a request: the path plus the payload with sorted keys."""
+    body = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(path.encode() + b"\0" + body).hexdigest()
+
+def _decode(response: httpx.Response):
+    """Decode a response body according to its Content-Type."""
+    if response.headers.get("content-type", "").startswith(MSGPACK_MEDIA_TYPE):
+        return msgpack.unpackb(response.content, raw=False)
+    return orjson.loads(response.content)
+
+def _busy_error(response: httpx.Response) -> AstrologyServiceBusyError:
+    try:
+        retry_after = float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        retry_after = None
+    logger.warning(f"Astrology service is busy: {response.status_code} (Retry-After {retry_after})")
+    return AstrologyServiceBusyError(response.status_code, retry_after)
+
+async def create_birth_chart(birth_data: dict) -> dict:
+    """Call the Astrology Service to create a new birth chart.
+
+    Concurrent calls with the same birth data share one upstream request.
+    Fails fast with AstrologyServiceConnectionError while the circuit
+    breaker is open or once the latency budget is spent.
+    """
+    if settings.ASTROLOGY_BATCH_ENABLED:
+        call = lambda: chart_batcher.submit(birth_data)
+    else:
+        call = lambda: _guarded(lambda: _request_birth_chart(birth_data))
+    return await single_flight.run(_flight_key("/calculate-chart", birth_data), call)
+
+async def _request_birth_chart(birth_data: dict) -> dict:
+    try:
+        response = await get_client().post(
+            "/calculate-chart",
+            content=orjson.dumps(birth_data),
+            headers=_request_headers()
+        )
+        response.raise_for_status()
+        return _decode(response)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in BUSY_STATUS_CODES:
+            raise _busy_error(e.response) from e
+        if 400 <= e.response.status_code < 500:
+            logger.warning(f"Client error from astrology service: {e.response.status_code} {e.response.text}")
+            raise AstrologyServiceClientError(e.response.status_code, e.response.text) from e
+        else:
+            logger.error(f"Server error from astrology service: {e.response.status_code} {e.response.text}")
+            raise AstrologyServiceServerError("Astrology service failed") from e
+    except (httpx.RequestError, httpx.TimeoutException) as e:
+        logger.error(f"Connection error calling astrology service: {e}")
+        raise AstrologyServiceConnectionError("Could not connect to astrology service") from e
+
+async def _request_birth_charts(records: List[dict]) -> List[Any]:
+    """One call to the batch endpoint; returns a chart or an AstrologyServiceClientError per record."""
+    try:
+        response = await get_client().post(
+            "/calculate-charts",
+            content=orjson.dumps({"records": records}),
+            headers=_request_headers()
+        )
+        response.raise_for_status()
+        results = _decode(response)["results"]
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in BUSY_STATUS_CODES:
+            raise _busy_error(e.response) from e
+        if 400 <= e.response.status_code < 500:
+            logger.warning(f"Client error from astrology service batch: {e.response.status_code} {e.response.text}")
+            if e.response.status_code in INVALID_REQUEST_STATUS_CODES:
+                raise AstrologyServiceInvalidRequestError(e.response.status_code, e.response.text) from e
+            raise AstrologyServiceClientError(e.response.status_code, e.response.text) from e
+        else:
+            logger.error(f"Server error from astrology service batch: {e.response.status_code} {e.response.text}")
+            raise AstrologyServiceServerError("Astrology service failed") from e
+    except (httpx.RequestError, httpx.TimeoutException) as e:
+        logger.error(f"Connection error calling astrology service batch: {e}")
+        raise AstrologyServiceConnectionError("Could not connect to astrology service") from e
+    return [
+        result["chart"] if result.get("error") is None else AstrologyServiceClientError(400, result["error"])
+        for result in sorted(results, key=lambda result: result["index"])
+    ]
+
+def _send_chart_batch(records: List[dict]) -> Awaitable[List[Any]]:
+    # A batch that fails as a whole is split and retried, so only a failing
+    # single record says the service itself is broken rather than one input
+    return _guarded(lambda: _request_birth_charts(records), record_server_errors=len(records) == 1)
+
+chart_batcher = MicroBatcher(
+    _send_chart_batch,
+    settings.ASTROLOGY_BATCH_WINDOW_MS / 1000.0,
+    settings.ASTROLOGY_BATCH_MAX_SIZE,
+    # Only errors one record can cause; a busy service or any other 4xx fails the whole batch at once
+    split_on=(AstrologyServiceInvalidRequestError, AstrologyServiceServerError)
+)
+
+async def get_daily_transits(birth_chart_id: str, planet_positions: dict, at: Optional[datetime] = None) -> dict:
+    """Call the Astrology Service to compare the sky at ``at`` (now by default) with a birth chart's natal positions.
+
+    Concurrent calls for the same chart and instant share one upstream
+    request. The request is a read, so it may be hedged when
+    ASTROLOGY_HEDGE_ENABLED is set.
+    """
+    path = f"/chart/{birth_chart_id}/transits"
+    payload = {"planet_positions": planet_positions}
+    if at is not None:
+        payload["at"] = at
+    return await single_flight.run(
+        _flight_key(path, payload),
+        lambda: _guarded(lambda: _request_daily_transits(birth_chart_id, payload), idempotent=True)
+    )
+
+async def _request_daily_transits(birth_chart_id: str, payload: dict) -> dict:
+    try:
+        response = await get_client().post(
+            f"/chart/{birth_chart_id}/transits",
+            content=orjson.dumps(payload),
+            headers=_request_headers()
+        )
+        response.raise_for_status()
+        return _decode(response)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code in BUSY_STATUS_CODES:
+            raise _busy_error(e.response) from e
+        if 400 <= e.response.status_code < 500:
+            logger.warning(f"Client error getting daily transits: {e.response.status_code} {e.response.text}")
+            raise AstrologyServiceClientError(e.response.status_code, e.response.text) from e
+        else:
+            logger.error(f"Server error getting daily transits: {e.response.status_code} {e.response.text}")
+            raise AstrologyServiceServerError("Astrology service failed") from e
+    except (httpx.RequestError, httpx.TimeoutException) as e:
+        logger.error(f"Connection error getting daily transits: {e}")
+        raise AstrologyServiceConnectionError("Could not connect to astrology service") from e
\ No newline at end of file
@@ -0,0 +1,83 @@
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Awaitable, Callable, Optional
+import pytz
+from app.core.config import get_settings
+from app.models.chart_cache import ChartCacheEntry
+from app.services.two_tier_cache import TwoTierCache
+
+settings = get_settings()
+
+# Part of every key; bump it whenever the astrology service's chart output or
+# calculation changes, so charts computed by the old version are not served
+CHART_CACHE_VERSION = 2
+
+def chart_cache_key(birth_data: dict, precision: int = settings.CHART_CACHE_COORDINATE_PRECISION) -> Optional[str]:
+    """Canonical hash of the birth data a chart depends on.
+
+    The local birth time is resolved through its timezone to a UTC instant the
+    way the astrology service does (pytz, standard time for ambiguous and
+    nonexistent times), so equivalent zone names share an entry and the key
+    names the instant the chart is computed for. Coordinates are rounded to
+    ``precision`` decimal places. Returns None when the data cannot be
+    normalized; such requests bypass the cache and let the astrology service
+    report the error.
+    """
+    try:
+        local = datetime.strptime(f"{birth_data['birth_date']} {birth_data['birth_time']}", "%Y-%m-%d %H:%M")
+        instant = pytz.timezone(birth_data['timezone']).localize(local, is_dst=False).astimezone(dt_timezone.utc)
+        latitude = round(float(birth_data['latitude']), precision)
+        longitude = round(float(birth_data['longitude']), precision)
+    except (KeyError, TypeError, ValueError, pytz.UnknownTimeZoneError):
+        return None
+    canonical = json.dumps(
+        {
+            'instant': instant.strftime("%Y-%m-%dT%H:%MZ"),
+            # Adding 0.0 folds -0.0 into 0.0
+            'latitude': latitude + 0.0,
+            'longitude': longitude + 0.0,
+            'version': CHART_CACHE_VERSION
+        },
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class ChartCache(TwoTierCache):
+    """Computed charts keyed on ``chart_cache_key``, kept for ``ttl_seconds`` in both tiers."""
+
+    document = ChartCacheEntry
+    value_field = 'chart_data'
+
+    def __init__(self, max_size: int = settings.CHART_CACHE_SIZE, ttl_seconds: int = settings.CHART_CACHE_TTL_SECONDS):
+        super().__init__(max_size)
+        self.ttl_seconds = ttl_seconds
+
+    def _query(self, key: str) -> dict:
+        return {'key': key}
+
+    async def get_or_create(self, birth_data: dict, create: Callable[[dict], Awaitable[dict]]) -> dict:
+        """Return the cached chart for ``birth_data`` or compute it with ``create`` and cache it."""
+        key = chart_cache_key(birth_data)
+        if key is None:
+            return await create(birth_data)
+
+        chart_data = self.get(key)
+        if chart_data is None:
+            chart_data = await create(birth_data)
+            if chart_data:
+                self.put(key, chart_data, datetime.utcnow() + timedelta(seconds=self.ttl_seconds))
+        elif isinstance(chart_data.get('birth_data'), dict):
+            # The cached chart may have been computed for an equivalent but
+            # differently spelled request; echo back what this caller sent.
+            chart_data['birth_data'] = {
+                'date': birth_data['birth_date'],
+                'time': birth_data['birth_time'],
+                'latitude': birth_data['latitude'],
+                'longitude': birth_data['longitude'],
+                'timezone': birth_data['timezone']
+            }
+        return chart_data
+
+chart_cache = ChartCache()
@@ -0,0 +1,69 @@
+import copy
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from app.core.config import get_settings
+from app.models.user import User
+
+settings = get_settings()
+
+# The user fields request handlers read; everything else stays in Mongo
+PRINCIPAL_FIELDS = ('id', 'email', 'name', 'chartId', 'preferences', 'is_active')
+
+class PrincipalCache:
+    """Short-lived LRU of authenticated users, keyed on (user id, token issue time).
+
+    Holds the projected user documents ``get_current_user`` loads, so a burst
+    of requests with one token costs a single Mongo round trip. Anything that
+    changes or removes a user must call ``invalidate``; other workers catch
+    up when their entries expire after ``ttl_seconds``.
+    """
+
+    def __init__(self, max_size: int = settings.PRINCIPAL_CACHE_SIZE, ttl_seconds: float = settings.PRINCIPAL_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, Optional[int]], Tuple[float, dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
+
+    def get_user(self, user_id: str, issued_at: Optional[int]) -> Optional[User]:
+        """The projected user for a token, from the cache or Mongo; None if the user doesn't exist."""
+        key = (user_id, issued_at)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return User._from_son(copy.deepcopy(entry[1]))
+
+        self.misses += 1
+        son = User.objects(id=user_id).only(*PRINCIPAL_FIELDS).as_pymongo().first()
+        if son is None:
+            self._entries.pop(key, None)
+            return None
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, son)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        return User._from_son(copy.deepcopy(son))
+
+    def invalidate(self, user_id: str):
+        """Forget every cached token of a user (logout, account deletion, profile changes)."""
+        user_id = str(user_id)
+        for key in [key for key in self._entries if key[0] == user_id]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+principal_cache = PrincipalCache()
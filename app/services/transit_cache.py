@@ -0,0 +1,63 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from typing import Awaitable, Callable, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from app.core.config import get_settings
+from app.models.transit_cache import TransitCacheEntry
+from app.services.two_tier_cache import TwoTierCache
+
+settings = get_settings()
+
+def local_day(timezone_name: Optional[str], now: Optional[datetime] = None) -> Tuple[str, datetime, datetime]:
+    """The current local date in ``timezone_name``, its local noon and the next local midnight.
+
+    Noon is an aware UTC datetime, the instant the day's transits are computed
+    for; midnight is naive UTC, when they expire. Unknown or missing zones
+    fall back to UTC.
+    """
+    try:
+        zone = ZoneInfo(timezone_name) if timezone_name else dt_timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = dt_timezone.utc
+    now = now or datetime.now(dt_timezone.utc)
+    today = now.astimezone(zone).date()
+    noon = datetime.combine(today, time(12), tzinfo=zone)
+    midnight = datetime.combine(today + timedelta(days=1), time(0), tzinfo=zone)
+    return today.isoformat(), noon.astimezone(dt_timezone.utc), midnight.astimezone(dt_timezone.utc).replace(tzinfo=None)
+
+class TransitCache(TwoTierCache):
+    """Daily transits keyed on (chart id, local date), optionally backed by Mongo.
+
+    Entries expire at the chart's next local midnight, when its daily
+    transits change.
+    """
+
+    document = TransitCacheEntry
+    value_field = 'transits'
+
+    def __init__(self, max_size: int = settings.TRANSIT_CACHE_SIZE, use_mongo: bool = settings.TRANSIT_CACHE_MONGO_ENABLED):
+        super().__init__(max_size, use_mongo)
+
+    def _query(self, key: Tuple[str, str]) -> dict:
+        chart_id, local_date = key
+        return {'chart_id': chart_id, 'local_date': local_date}
+
+    def invalidate(self, chart_id: str):
+        """Forget every cached day of a chart, e.g. when the chart is deleted."""
+        self.invalidate_matching(lambda key: key[0] == chart_id, chart_id=chart_id)
+
+    async def get_or_fetch(self, chart_id: str, timezone_name: Optional[str],
+                           fetch: Callable[[datetime], Awaitable[dict]]) -> dict:
+        """Return today's cached transits for the chart or fetch them with ``fetch`` and cache them.
+
+        ``fetch`` is called with the local noon of the day, so every worker
+        caching the day computes it for the same instant.
+        """
+        local_date, noon, expires_at = local_day(timezone_name)
+        transits = self.get((chart_id, local_date))
+        if transits is None:
+            transits = await fetch(noon)
+            if transits:
+                self.put((chart_id, local_date), transits, expires_at)
+        return transits
+
+transit_cache = TransitCache()
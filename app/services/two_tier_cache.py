@@ -0,0 +1,102 @@
+import copy
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Hashable, Optional, Tuple, Type
+from mongoengine import Document
+from mongoengine.errors import NotUniqueError
+
+class TwoTierCache(ABC):
+    """An in-process LRU in front of a Mongo collection whose documents expire through a TTL index.
+
+    Subclasses name the ``document`` class and the ``value_field`` holding
+    the cached dict, and map their keys to the document fields that
+    identify an entry in ``_query``. Every entry carries its own expiry
+    (naive UTC), honoured by both tiers. Values are copied in and out, so
+    callers may modify what they get.
+    """
+
+    document: Type[Document]
+    value_field: str
+
+    def __init__(self, max_size: int, use_mongo: bool = True):
+        self.max_size = max_size
+        self.use_mongo = use_mongo
+        self._entries: "OrderedDict[Hashable, Tuple[datetime, dict]]" = OrderedDict()
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+
+    @abstractmethod
+    def _query(self, key: Hashable) -> dict:
+        """Document fields identifying ``key``."""
+
+    def stats(self) -> dict:
+        """Hit/miss counters for both tiers."""
+        lookups = self.memory_hits + self.mongo_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'mongo_hits': self.mongo_hits,
+            'misses': self.misses,
+            'hit_ratio': (self.memory_hits + self.mongo_hits) / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'mongo_enabled': self.use_mongo
+        }
+
+    def _remember(self, key: Hashable, expires_at: datetime, value: dict):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        """Look ``key`` up in memory, then in Mongo, promoting Mongo hits into memory."""
+        now = datetime.utcnow()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return copy.deepcopy(value)
+            del self._entries[key]
+
+        if self.use_mongo:
+            stored = self.document.objects(expires_at__gt=now, **self._query(key)).first()
+            if stored is not None:
+                value = getattr(stored, self.value_field)
+                self._remember(key, stored.expires_at, value)
+                self.mongo_hits += 1
+                return copy.deepcopy(value)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: dict, expires_at: datetime):
+        """Store ``value`` in both tiers until ``expires_at`` (naive UTC)."""
+        self._remember(key, expires_at, copy.deepcopy(value))
+        if not self.use_mongo:
+            return
+        try:
+            self.document.objects(**self._query(key)).update_one(
+                upsert=True,
+                set__created_at=datetime.utcnow(),
+                set__expires_at=expires_at,
+                **{f"set__{self.value_field}": value}
+            )
+        except NotUniqueError:
+            # A concurrent writer stored the same key first
+            pass
+
+    def invalidate_matching(self, matches: Callable[[Hashable], bool], **filters):
+        """Forget the keys ``matches`` accepts in memory and the documents ``filters`` select in Mongo."""
+        for key in [key for key in self._entries if matches(key)]:
+            del self._entries[key]
+        if self.use_mongo:
+            self.document.objects(**filters).delete()
+
+    def clear(self):
+        """Drop the in-memory tier and reset the counters."""
+        self._entries.clear()
+        self.memory_hits = self.mongo_hits = self.misses = 0
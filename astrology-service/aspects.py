@@ -0,0 +1,95 @@
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+import config
+
+# Aspect name -> (exact angle in degrees, default orb in degrees, major?)
+ASPECTS = {
+    'conjunction': (0.0, 8.0, True),
+    'opposition': (180.0, 8.0, True),
+    'trine': (120.0, 8.0, True),
+    'square': (90.0, 7.0, True),
+    'sextile': (60.0, 6.0, True),
+    'quincunx': (150.0, 3.0, False),
+    'semisextile': (30.0, 2.0, False),
+    'semisquare': (45.0, 2.0, False),
+    'sesquiquadrate': (135.0, 2.0, False),
+    'quintile': (72.0, 2.0, False),
+    'biquintile': (144.0, 2.0, False)
+}
+
+class AspectTable:
+    """The aspects to look for and their orbs, as arrays ready for broadcasting."""
+
+    def __init__(self, orbs: Optional[Dict[str, float]] = None, include_minor: bool = True):
+        orbs = {**config.ASPECT_ORBS, **(orbs or {})}
+        unknown = set(orbs) - set(ASPECTS)
+        if unknown:
+            raise ValueError(f"Unknown aspects: {', '.join(sorted(unknown))}")
+        self.names = [name for name, (_, _, major) in ASPECTS.items() if major or include_minor]
+        self.angles = np.array([ASPECTS[name][0] for name in self.names])
+        self.orbs = np.array([orbs.get(name, ASPECTS[name][1]) for name in self.names])
+        self.major = np.array([ASPECTS[name][2] for name in self.names])
+
+def separations(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise angular separation (0-180 degrees) of longitudes ``a (..., n)`` and ``b (..., m)``."""
+    difference = np.abs(a[..., :, np.newaxis] - b[..., np.newaxis, :]) % 360.0
+    return np.minimum(difference, 360.0 - difference)
+
+def classify(separation: np.ndarray, table: AspectTable):
+    """Tightest aspect for every separation in one broadcast.
+
+    Returns ``(index, orb)`` with the shape of ``separation``; ``index`` is -1
+    where no aspect is within orb.
+    """
+    deviation = np.abs(separation[..., np.newaxis] - table.angles)
+    deviation = np.where(deviation <= table.orbs, deviation, np.inf)
+    index = np.argmin(deviation, axis=-1)
+    orb = np.take_along_axis(deviation, index[..., np.newaxis], axis=-1)[..., 0]
+    index = np.where(np.isfinite(orb), index, -1)
+    return index, orb
+
+def _to_records(index: np.ndarray, orb: np.ndarray, separation: np.ndarray, table: AspectTable,
+                names_a: Sequence[str], names_b: Sequence[str]) -> List[Dict]:
+    rows, cols = np.nonzero(index >= 0)
+    return [
+        {
+            'planet1': names_a[i],
+            'planet2': names_b[j],
+            'aspect': table.names[index[i, j]],
+            'major': bool(table.major[index[i, j]]),
+            'angle': float(separation[i, j]),
+            'orb': float(orb[i, j])
+        }
+        for i, j in zip(rows.tolist(), cols.tolist())
+    ]
+
+def natal_aspects_batch(longitudes: np.ndarray, names: Sequence[str],
+                        orbs: Optional[Dict[str, float]] = None, include_minor: bool = True) -> List[List[Dict]]:
+    """Aspects between the bodies of each chart; ``longitudes`` has shape ``(n_charts, n_bodies)``."""
+    table = AspectTable(orbs, include_minor)
+    separation = separations(longitudes, longitudes)
+    index, orb = classify(separation, table)
+    # Each unordered pair once, and no body aspecting itself
+    lower = np.tril_indices(len(names))
+    index[..., lower[0], lower[1]] = -1
+    return [_to_records(index[k], orb[k], separation[k], table, names, names) for k in range(len(longitudes))]
+
+def transit_aspects_batch(transit_longitudes: np.ndarray, transit_names: Sequence[str],
+                          natal_longitudes: np.ndarray, natal_names: Sequence[str],
+                          orbs: Optional[Dict[str, float]] = None, include_minor: bool = True) -> List[List[Dict]]:
+    """Aspects from transiting bodies to each natal chart.
+
+    ``transit_longitudes`` is ``(n_transits,)`` when one sky is shared by every
+    chart, or ``(n_charts, n_transits)``; ``natal_longitudes`` is ``(n_charts, n_natal)``.
+    """
+    table = AspectTable(orbs, include_minor)
+    natal_longitudes = np.asarray(natal_longitudes)
+    transit_longitudes = np.broadcast_to(
+        transit_longitudes, natal_longitudes.shape[:-1] + np.shape(transit_longitudes)[-1:]
+    )
+    separation = separations(transit_longitudes, natal_longitudes)
+    index, orb = classify(separation, table)
+    return [
+        _to_records(index[k], orb[k], separation[k], table, transit_names, natal_names)
+        for k in range(len(natal_longitudes))
+    ]
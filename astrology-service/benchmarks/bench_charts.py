@@ -0,0 +1,204 @@
+"""Benchmark suite for the chart calculation path, with baseline comparison.
+
+Runs offline against the kernel in EPHEMERIS_DIR. From the astrology-service directory:
+
+    python -m benchmarks.bench_charts --output results.json
+    python -m benchmarks.bench_charts --baseline benchmarks/baseline.json --threshold 15
+    python -m benchmarks.bench_charts --save-baseline benchmarks/baseline.json
+
+Exits with status 1 when any metric regresses past the threshold.
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+import numpy as np
+
+# Metrics where a larger value is better; every other metric is a cost
+HIGHER_IS_BETTER = ('charts_per_second',)
+# Tail and mean latencies are reported but too noisy to gate on
+NOT_COMPARED = ('p95_ms', 'mean_ms')
+
+def _records(count: int, offset: int = 0) -> List[Dict]:
+    """Deterministic birth records spread over dates, times and latitudes."""
+    return [
+        {
+            'birth_date': f"{1950 + (offset + i) % 70}-{1 + (offset + i) % 12:02d}-{1 + (offset + i) % 28:02d}",
+            'birth_time': f"{(offset + i) % 24:02d}:{(7 * (offset + i)) % 60:02d}",
+            'latitude': -60.0 + (offset + i) % 120,
+            'longitude': -180.0 + (7 * (offset + i)) % 360,
+            'timezone': 'UTC'
+        }
+        for i in range(count)
+    ]
+
+def _summary(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        'median_ms': statistics.median(ordered),
+        'p95_ms': ordered[max(0, int(len(ordered) * 0.95) - 1)],
+        'mean_ms': statistics.fmean(ordered)
+    }
+
+def _time_ms(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000.0
+
+def cold_start() -> Dict[str, float]:
+    """Import, kernel load and first chart, measured in this (fresh) process."""
+    start = time.perf_counter()
+    from ephemeris import get_ephemeris
+    from calculations import calculate_birth_chart
+    imported = time.perf_counter()
+    get_ephemeris()
+    loaded = time.perf_counter()
+    record = _records(1)[0]
+    calculate_birth_chart(record['birth_date'], record['birth_time'], record['latitude'],
+                          record['longitude'], record['timezone'])
+    charted = time.perf_counter()
+    return {
+        'import_ms': (imported - start) * 1000.0,
+        'ephemeris_load_ms': (loaded - imported) * 1000.0,
+        'first_chart_ms': (charted - loaded) * 1000.0,
+        'total_ms': (charted - start) * 1000.0
+    }
+
+def measure_cold_start() -> Dict[str, float]:
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_charts', '--cold-start-only'],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure_warm(iterations: int) -> Dict[str, float]:
+    from calculations import calculate_birth_chart
+    samples = [
+        _time_ms(lambda: calculate_birth_chart(record['birth_date'], record['birth_time'], record['latitude'],
+                                               record['longitude'], record['timezone']))
+        for record in _records(iterations, offset=1000)
+    ]
+    return _summary(samples)
+
+def measure_batches(sizes: List[int], repeats: int) -> Dict[str, Dict[str, float]]:
+    from calculations import calculate_birth_charts
+    results = {}
+    for size in sizes:
+        samples = [_time_ms(lambda: calculate_birth_charts(_records(size, offset=2000 + r * size)))
+                   for r in range(repeats)]
+        median = statistics.median(samples)
+        results[str(size)] = {'median_ms': median, 'charts_per_second': size / (median / 1000.0)}
+    return results
+
+def measure_aspects(iterations: int, charts: int = 1000) -> Dict[str, float]:
+    from aspects import natal_aspects_batch
+    rng = np.random.default_rng(0)
+    longitudes = rng.uniform(0.0, 360.0, (charts, 10))
+    names = [f"body{i}" for i in range(10)]
+    samples = [_time_ms(lambda: natal_aspects_batch(longitudes, names)) for _ in range(iterations)]
+    return {**_summary(samples), 'charts': charts}
+
+def measure_houses(iterations: int, charts: int = 1000) -> Dict[str, Dict[str, float]]:
+    from ephemeris import get_ephemeris
+    from houses import HOUSE_SYSTEMS, compute_houses
+    ts = get_ephemeris().ts
+    rng = np.random.default_rng(0)
+    latitudes = rng.uniform(-66.0, 66.0, charts)
+    longitudes = rng.uniform(-180.0, 180.0, charts)
+    results = {}
+    for system in HOUSE_SYSTEMS:
+        samples = []
+        for i in range(iterations):
+            # Fresh timestamps each time so the sidereal time cache is part of the cost
+            t = ts.tt_jd(2440000.5 + rng.uniform(0.0, 20000.0, charts))
+            samples.append(_time_ms(lambda: compute_houses(t, latitudes, longitudes, system)))
+        results[system] = {**_summary(samples), 'charts': charts}
+    return results
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+
+def run_suite(iterations: int, batch_sizes: List[int], repeats: int) -> Dict:
+    results = {'cold_start': measure_cold_start()}
+    results['warm_chart'] = measure_warm(iterations)
+    results['batch'] = measure_batches(batch_sizes, repeats)
+    results['aspects'] = measure_aspects(iterations)
+    results['houses'] = measure_houses(iterations)
+    results['peak_rss_mb'] = peak_rss_mb()
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        },
+        'results': results
+    }
+
+def _flatten(results: Dict, prefix: str = '') -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{name}."))
+        elif isinstance(value, (int, float)) and key != 'charts':
+            flat[name] = float(value)
+    return flat
+
+def compare(current: Dict, baseline: Dict, threshold_percent: float) -> List[str]:
+    """Metrics that are worse than the baseline by more than ``threshold_percent``."""
+    regressions = []
+    now, before = _flatten(current['results']), _flatten(baseline['results'])
+    for name, value in sorted(now.items()):
+        reference = before.get(name)
+        if not reference or name.endswith(NOT_COMPARED):
+            continue
+        change = (value - reference) / reference * 100.0
+        if name.endswith(HIGHER_IS_BETTER):
+            change = -change
+        if change > threshold_percent:
+            regressions.append(f"{name}: {reference:.3f} -> {value:.3f} ({change:+.1f}% worse)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeats", type=int, default=3, help="runs per batch size")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--baseline", help="compare against results stored at this path")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed regression in percent")
+    parser.add_argument("--save-baseline", help="store these results as the new baseline")
+    parser.add_argument("--cold-start-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_only:
+        print(json.dumps(cold_start()))
+        return
+
+    report = run_suite(args.iterations, args.batch_sizes, args.repeats)
+    text = json.dumps(report, indent=2)
+    print(text)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                f.write(text + '\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"Regressions beyond {args.threshold:.0f}%:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0f}%", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
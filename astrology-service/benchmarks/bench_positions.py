@@ -0,0 +1,63 @@
+"""Per-chart latency of the planet position computation, before and after vectorization.
+
+Run from the astrology-service directory:
+
+    python -m benchmarks.bench_positions --iterations 200
+"""
+import argparse
+import statistics
+import time
+from skyfield.api import Topos
+from ephemeris import get_ephemeris
+from calculations import planet_vectors, positions_to_radec
+
+def legacy_planet_positions(ephemeris, t, observer):
+    """The original per-body loop, which rebuilds the observer vector for every body."""
+    planet_positions = {}
+    for name, body in ephemeris.planets.items():
+        astrometric = (ephemeris.earth + observer).at(t).observe(body)
+        ra, dec, distance = astrometric.radec()
+        planet_positions[name] = {
+            'ra': ra.hours,
+            'dec': dec.degrees,
+            'distance': distance.au
+        }
+    return planet_positions
+
+def vectorized_planet_positions(ephemeris, t, observer):
+    """Every body in one pass, as the chart endpoints compute them."""
+    ra, dec, distance = positions_to_radec(planet_vectors(ephemeris, t, observer))
+    return {
+        name: {'ra': float(ra[i]), 'dec': float(dec[i]), 'distance': float(distance[i])}
+        for i, name in enumerate(ephemeris.planets)
+    }
+
+def time_per_chart(func, ephemeris, iterations):
+    ts = ephemeris.ts
+    samples = []
+    for i in range(iterations):
+        t = ts.utc(1950 + i % 70, 1 + i % 12, 1 + i % 28, i % 24, i % 60)
+        observer = Topos(latitude_degrees=-60 + i % 120, longitude_degrees=-180 + (7 * i) % 360)
+        start = time.perf_counter()
+        func(ephemeris, t, observer)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    ephemeris = get_ephemeris()
+    # Warm up both paths so one-off segment loading is not counted
+    time_per_chart(legacy_planet_positions, ephemeris, 5)
+    time_per_chart(vectorized_planet_positions, ephemeris, 5)
+
+    for label, func in (("before (per-body loop)", legacy_planet_positions),
+                        ("after (vectorized)", vectorized_planet_positions)):
+        samples = time_per_chart(func, ephemeris, args.iterations)
+        print(f"{label:24s} median {statistics.median(samples):7.3f} ms  "
+              f"p95 {sorted(samples)[int(len(samples) * 0.95) - 1]:7.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Import time per module for the service entry point, from ``python -X importtime``.
+
+Run from the astrology-service directory:
+
+    python -m benchmarks.startup_time --top 25
+    python -m benchmarks.startup_time --module calculations --json
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+from typing import Dict, List
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def import_times(module: str) -> List[Dict]:
+    """Self and cumulative import time (ms) of every module imported by ``import module``, in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            rows.append({
+                "module": match.group(4),
+                "self_ms": int(match.group(1)) / 1000.0,
+                "cumulative_ms": int(match.group(2)) / 1000.0,
+                # -X importtime indents nested imports by two spaces per level
+                "depth": (len(match.group(3)) - 1) // 2
+            })
+    return rows
+
+def ephemeris_load_ms() -> float:
+    """Time to load the kernel once the modules are imported, in a fresh interpreter."""
+    code = (
+        "import time; from ephemeris import get_ephemeris; "
+        "start = time.perf_counter(); get_ephemeris(); print((time.perf_counter() - start) * 1000.0)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--top", type=int, default=20, help="how many modules to list")
+    parser.add_argument("--json", action="store_true", help="print machine-readable output")
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    total = next((row["cumulative_ms"] for row in rows if row["module"] == args.module), 0.0)
+    slowest = sorted(rows, key=lambda row: row["cumulative_ms"], reverse=True)[:args.top]
+    load = ephemeris_load_ms()
+
+    if args.json:
+        print(json.dumps({"module": args.module, "import_ms": total, "ephemeris_load_ms": load,
+                          "modules": slowest}, indent=2))
+        return
+
+    print(f"import {args.module}: {total:.1f} ms, ephemeris load: {load:.1f} ms\n")
+    print(f"{'cumulative':>11s} {'self':>9s}  module")
+    for row in slowest:
+        print(f"{row['cumulative_ms']:9.1f}ms {row['self_ms']:7.1f}ms  {'  ' * row['depth']}{row['module']}")
+
+if __name__ == "__main__":
+    main()
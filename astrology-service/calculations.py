@@ -1,73 +1,122 @@
+import math
 from datetime import datetime
-from typing import Dict, Any
-from jhora.horoscope.chart import charts
-from skyfield.api import load, Topos
+from typing import Dict, Any, List
+import numpy as np
+from skyfield.api import Topos
 from pytz import timezone as pytz_timezone
- 
-def calculate_birth_chart(
-    birth_date: str,
-    birth_time: str,
-    latitude: float,
-    longitude: float,
-    timezone: str
-) -> Dict[str, Any]:
-    """Calculate complete birth chart data using Skyfield and PyJHora."""
+from pytz.exceptions import UnknownTimeZoneError
+from ephemeris import get_ephemeris
+from aspects import natal_aspects_batch
+from houses import compute_houses, houses_to_dict
+from zodiac import ayanamsa, chart_zodiac, derive, ecliptic_of_date, point_to_dict
+import config
+
+def observe_planets(observer_at, bodies) -> np.ndarray:
+    """Astrometric ICRS vectors (au) of every body seen from one observer position.
+
+    ``observer_at`` is the barycentric position of the observer, computed once
+    by the caller. The result has shape ``(len(bodies), 3, *t.shape)`` so that
+    a time array yields every chart in the batch at once.
+    """
+    return np.stack([observer_at.observe(body).position.au for body in bodies])
+
+def geocentric_planet_vectors(ephemeris, t, engine: str = config.POSITION_ENGINE) -> np.ndarray:
+    """Geocentric ICRS vectors (au) of every body, shape ``(n_bodies, 3, *t.shape)``."""
+    table = ephemeris.table
+    if engine == 'table' and table is not None and table.covers(t.tt):
+        return table.positions(t.tt)
+    return observe_planets(ephemeris.earth.at(t), ephemeris.planets.values())
+
+def planet_vectors(ephemeris, t, observer, engine: str = config.POSITION_ENGINE) -> np.ndarray:
+    """Topocentric ICRS vectors (au) of every body, shape ``(n_bodies, 3, *t.shape)``.
+
+    With the ``table`` engine the geocentric positions are interpolated from
+    the memory-mapped table and shifted by the observer's geocentric offset;
+    times outside the table's window fall back to the full Skyfield path.
+    """
+    table = ephemeris.table
+    if engine == 'table' and table is not None and table.covers(t.tt):
+        return table.positions(t.tt) - observer.at(t).position.au
+    observer_at = (ephemeris.earth + observer).at(t)
+    return observe_planets(observer_at, ephemeris.planets.values())
+
+def positions_to_radec(xyz: np.ndarray):
+    """Convert stacked ICRS vectors to RA (hours), declination (degrees) and distance (au)."""
+    x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    distance = np.sqrt(x * x + y * y + z * z)
+    ra = np.degrees(np.arctan2(y, x)) % 360.0 / 15.0
+    dec = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    return ra, dec, distance
+
+def parse_birth_datetime(birth_date: str, birth_time: str, timezone: str) -> datetime:
+    """Parse local birth date and time and localize them to the given timezone."""
     try:
-        # Set up Skyfield
-        ts = load.timescale()
-        eph = load('de421.bsp')
-        
-        # Parse birth datetime and localize it
         tz = pytz_timezone(timezone)
+    except UnknownTimeZoneError:
+        raise ValueError(f"Unknown timezone: {timezone}")
+    try:
         birth_dt_naive = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M")
-        birth_dt_aware = tz.localize(birth_dt_naive)
-        
-        # Create Skyfield time object
-        t = ts.from_datetime(birth_dt_aware)
-        
-        # Set observer location
-        observer = Topos(latitude_degrees=latitude, longitude_degrees=longitude)
-        
-        # Define planets
-        planets = {
-            'sun': eph['sun'],
-            'moon': eph['moon'],
-            'mercury': eph['mercury'],
-            'venus': eph['venus'],
-            'mars': eph['mars'],
-            'jupiter': eph['jupiter barycenter'],
-            'saturn': eph['saturn barycenter'],
-            'uranus': eph['uranus barycenter'],
-            'neptune': eph['neptune barycenter'],
-            'pluto': eph['pluto barycenter']
-        }
-        
-        # Calculate geocentric positions
-        planet_positions = {}
-        for name, body in planets.items():
-            astrometric = (eph['earth'] + observer).at(t).observe(body)
-            ra, dec, distance = astrometric.radec()
-            planet_positions[name] = {
-                'ra': ra.hours,
-                'dec': dec.degrees,
-                'distance': distance.au
-            }
-            
     except ValueError:
         raise ValueError("Invalid date or time format. Use YYYY-MM-DD and HH:MM.")
-    
-    # Calculate houses using Sripathi system with PyJHora
-    # Note: PyJHora integration requires passing planet positions
-    # This part needs to be adapted based on how PyJHora accepts planetary data
-    houses = {} # Placeholder for PyJHora integration
-    
-    # Placeholder for aspects
-    aspects = []
- 
+    return tz.localize(birth_dt_naive)
+
+def validate_coordinates(latitude: float, longitude: float):
+    """Raise ValueError unless latitude and longitude are finite and within range."""
+    if not (math.isfinite(latitude) and -90.0 <= latitude <= 90.0):
+        raise ValueError(f"Invalid latitude: {latitude}")
+    if not (math.isfinite(longitude) and -180.0 <= longitude <= 180.0):
+        raise ValueError(f"Invalid longitude: {longitude}")
+
+def _compute_charts(ephemeris, t, latitudes, longitudes) -> Dict[str, Any]:
+    """Every array a chart needs, for one time or a whole batch, in a single vectorized pass."""
+    observer = Topos(latitude_degrees=latitudes, longitude_degrees=longitudes)
+    xyz = planet_vectors(ephemeris, t, observer)
+    ra, dec, distance = positions_to_radec(xyz)
+    tropical, ecliptic_latitude = ecliptic_of_date(xyz, t)
+
+    # Ascendant, MC and cusps in the configured house system
+    houses = compute_houses(t, latitudes, longitudes)
+
+    # Signs and nakshatras for every body and both angles
+    ayanamsa_degrees = ayanamsa(t)
+    derived_bodies = derive(tropical, ayanamsa_degrees)
+    derived_angles = derive(np.stack([houses['ascendant'], houses['mc']]), ayanamsa_degrees)
+
+    # One aspect pass over every chart, as an (n_charts, n_bodies) array
+    aspects = natal_aspects_batch(np.atleast_2d(tropical.T), list(ephemeris.planets))
+
     return {
-        'planet_positions': planet_positions,
+        'ra': ra,
+        'dec': dec,
+        'distance': distance,
+        'ecliptic_latitude': ecliptic_latitude,
         'houses': houses,
-        'aspects': aspects,
+        'ayanamsa': ayanamsa_degrees,
+        'derived_bodies': derived_bodies,
+        'derived_angles': derived_angles,
+        'aspects': aspects
+    }
+
+def _chart_result(arrays: Dict[str, Any], names: List[str], index: tuple, birth_date: str, birth_time: str,
+                  latitude: float, longitude: float, timezone: str) -> Dict[str, Any]:
+    """Assemble one chart from the arrays of ``_compute_charts``; ``index`` is ``()`` or ``(column,)``."""
+    planet_positions = {}
+    for i, name in enumerate(names):
+        position = (i,) + index
+        planet_positions[name] = {
+            'ra': float(arrays['ra'][position]),
+            'dec': float(arrays['dec'][position]),
+            'distance': float(arrays['distance'][position]),
+            'latitude': float(arrays['ecliptic_latitude'][position]),
+            **point_to_dict(arrays['derived_bodies'], position)
+        }
+
+    return {
+        **chart_zodiac(arrays['derived_bodies'], arrays['derived_angles'], names,
+                       arrays['ayanamsa'][index], index),
+        'planet_positions': planet_positions,
+        'houses': houses_to_dict(arrays['houses'], config.HOUSE_SYSTEM, index),
+        'aspects': arrays['aspects'][index[0] if index else 0],
         'birth_data': {
             'date': birth_date,
             'time': birth_time,
@@ -76,3 +125,81 @@ def calculate_birth_chart(
             'timezone': timezone
         }
     }
+
+def calculate_birth_chart(
+    birth_date: str,
+    birth_time: str,
+    latitude: float,
+    longitude: float,
+    timezone: str
+) -> Dict[str, Any]:
+    """Calculate complete birth chart data using Skyfield."""
+    # Shared, already-loaded Skyfield objects
+    ephemeris = get_ephemeris()
+    
+    # Parse birth datetime and localize it
+    validate_coordinates(latitude, longitude)
+    birth_dt_aware = parse_birth_datetime(birth_date, birth_time, timezone)
+    
+    # Create Skyfield time object
+    t = ephemeris.ts.from_datetime(birth_dt_aware)
+    ephemeris.require_coverage(t)
+    
+    # Positions, houses, zodiac and aspects of all bodies at once
+    arrays = _compute_charts(ephemeris, t, latitude, longitude)
+
+    return _chart_result(arrays, list(ephemeris.planets), (), birth_date, birth_time, latitude, longitude, timezone)
+
+def calculate_birth_charts(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Calculate many birth charts with one ephemeris evaluation over a time array.
+
+    Each record has the same keys as the arguments of ``calculate_birth_chart``.
+    Results are returned in input order; a record that cannot be parsed, has
+    invalid coordinates or falls outside the kernel's dates yields
+    ``{'error': ...}`` in its slot, and only the valid records are computed.
+    """
+    ephemeris = get_ephemeris()
+    results: List[Dict[str, Any]] = [None] * len(records)
+
+    valid = []
+    moments = []
+    for index, record in enumerate(records):
+        try:
+            validate_coordinates(record['latitude'], record['longitude'])
+            moments.append(parse_birth_datetime(record['birth_date'], record['birth_time'], record['timezone']))
+            valid.append(index)
+        except ValueError as e:
+            results[index] = {'error': str(e)}
+
+    if valid:
+        t = ephemeris.ts.from_datetimes(moments)
+        covered = ephemeris.covers(t)
+        if not covered.all():
+            error = str(ephemeris.coverage_error())
+            for index in np.array(valid)[~covered]:
+                results[index] = {'error': error}
+            valid = [index for index, inside in zip(valid, covered) if inside]
+            t = t[covered]
+
+    if valid:
+        arrays = _compute_charts(
+            ephemeris,
+            t,
+            np.array([records[i]['latitude'] for i in valid], dtype=float),
+            np.array([records[i]['longitude'] for i in valid], dtype=float)
+        )
+        names = list(ephemeris.planets)
+        for column, index in enumerate(valid):
+            record = records[index]
+            results[index] = {'chart': _chart_result(
+                arrays,
+                names,
+                (column,),
+                record['birth_date'],
+                record['birth_time'],
+                record['latitude'],
+                record['longitude'],
+                record['timezone']
+            )}
+
+    return results
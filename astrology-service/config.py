@@ -0,0 +1,53 @@
+import json
+import os
+
+# Ephemeris settings
+EPHEMERIS_DIR = os.getenv("EPHEMERIS_DIR", ".")
+EPHEMERIS_FILE = os.getenv("EPHEMERIS_FILE", "de421.bsp")
+
+# Batch settings
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "1000"))
+
+# Position engine: "skyfield" evaluates the kernel, "table" interpolates the
+# precomputed table built by ephemeris_table.py and falls back to Skyfield
+# outside its date window
+POSITION_ENGINE = os.getenv("POSITION_ENGINE", "skyfield")
+EPHEMERIS_TABLE_PATH = os.getenv("EPHEMERIS_TABLE_PATH", os.path.join(EPHEMERIS_DIR, "ephemeris_table.npy"))
+# Date-range kernel excerpt shared by all workers; used instead of EPHEMERIS_FILE when present
+EPHEMERIS_EXCERPT_PATH = os.getenv("EPHEMERIS_EXCERPT_PATH", os.path.join(EPHEMERIS_DIR, "ephemeris_excerpt.bsp"))
+
+# Transit settings: the sky is computed once per slot and shared by all charts
+TRANSIT_SLOT_MINUTES = int(os.getenv("TRANSIT_SLOT_MINUTES", "1440"))
+TRANSIT_SNAPSHOT_CACHE_SIZE = int(os.getenv("TRANSIT_SNAPSHOT_CACHE_SIZE", "48"))
+
+# Aspect orb overrides in degrees, as JSON, e.g. {"conjunction": 10, "sextile": 4}
+ASPECT_ORBS = json.loads(os.getenv("ASPECT_ORBS", "{}"))
+
+# House settings
+HOUSE_SYSTEM = os.getenv("HOUSE_SYSTEM", "sripathi")
+SIDEREAL_TIME_CACHE_SIZE = int(os.getenv("SIDEREAL_TIME_CACHE_SIZE", "100000"))
+
+# Zodiac settings: which zodiac the top-level ascendant/sun_sign/moon_sign use,
+# and the ayanamsa for sidereal longitudes
+ZODIAC = os.getenv("ZODIAC", "sidereal")
+AYANAMSA = os.getenv("AYANAMSA", "lahiri")
+
+# Chart execution: "inline" computes on the event loop, "process" hands charts
+# to a pool of worker processes with a bounded queue
+CHART_EXECUTOR = os.getenv("CHART_EXECUTOR", "inline")
+CHART_WORKERS = int(os.getenv("CHART_WORKERS", str(os.cpu_count() or 1)))
+CHART_QUEUE_SIZE = int(os.getenv("CHART_QUEUE_SIZE", str(4 * (os.cpu_count() or 1))))
+CHART_RETRY_AFTER_SECONDS = int(os.getenv("CHART_RETRY_AFTER_SECONDS", "1"))
+
+# Event search: sampling step, bisection tolerance and the longest range per request
+EVENT_SEARCH_STEP_HOURS = float(os.getenv("EVENT_SEARCH_STEP_HOURS", "12"))
+EVENT_SEARCH_TOLERANCE_SECONDS = float(os.getenv("EVENT_SEARCH_TOLERANCE_SECONDS", "1"))
+EVENT_SEARCH_MAX_DAYS = int(os.getenv("EVENT_SEARCH_MAX_DAYS", "3660"))
+
+# Streaming ephemeris ranges: steps computed per chunk and the most steps per request
+EPHEMERIS_RANGE_CHUNK_SIZE = int(os.getenv("EPHEMERIS_RANGE_CHUNK_SIZE", "1000"))
+EPHEMERIS_RANGE_MAX_POINTS = int(os.getenv("EPHEMERIS_RANGE_MAX_POINTS", "10000000"))
+
+# Startup: "eager" loads the ephemeris before serving, "background" serves
+# /health right away (reporting "starting") and loads it in the background
+STARTUP_MODE = os.getenv("STARTUP_MODE", "eager")
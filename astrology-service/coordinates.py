@@ -0,0 +1,29 @@
+from typing import Dict
+import numpy as np
+
+# Mean obliquity of the ecliptic at J2000.0, in degrees
+J2000_OBLIQUITY = 23.4392911
+
+def radec_to_vectors(ra_hours, dec_degrees) -> np.ndarray:
+    """Unit ICRS vectors for RA (hours) and declination (degrees), shape ``(3, ...)``."""
+    ra = np.radians(np.asarray(ra_hours, dtype=float) * 15.0)
+    dec = np.radians(np.asarray(dec_degrees, dtype=float))
+    return np.array([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)])
+
+def ecliptic_longitude(xyz: np.ndarray, axis: int = 0) -> np.ndarray:
+    """Ecliptic longitude (degrees, J2000 ecliptic) of ICRS vectors laid out along ``axis``.
+
+    Use ``axis=1`` for the ``(n_bodies, 3, ...)`` stacks built by ``calculations``.
+    """
+    x, y, z = (np.take(xyz, i, axis=axis) for i in range(3))
+    eps = np.radians(J2000_OBLIQUITY)
+    return np.degrees(np.arctan2(y * np.cos(eps) + z * np.sin(eps), x)) % 360.0
+
+def positions_to_longitudes(planet_positions: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Ecliptic longitudes of a ``planet_positions`` mapping as returned by the chart endpoints."""
+    names = list(planet_positions)
+    vectors = radec_to_vectors(
+        [planet_positions[name]['ra'] for name in names],
+        [planet_positions[name]['dec'] for name in names]
+    )
+    return dict(zip(names, ecliptic_longitude(vectors).tolist()))
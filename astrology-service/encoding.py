@@ -0,0 +1,55 @@
+from typing import Any, Iterable, Iterator, Optional
+import msgpack
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/msgpack", "application/vnd.msgpack")
+JSON_MEDIA_TYPES = ("application/json", "application/*", "*/*")
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+def _quality(accept: str, media_types: Iterable[str]) -> float:
+    best = 0.0
+    for part in accept.split(","):
+        media_type, *params = (item.strip() for item in part.split(";"))
+        if media_type.lower() not in media_types:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        best = max(best, q)
+    return best
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when the Accept header ranks MessagePack at least as high as JSON."""
+    if not accept:
+        return False
+    msgpack_q = _quality(accept, MSGPACK_MEDIA_TYPES)
+    return msgpack_q > 0 and msgpack_q >= _quality(accept, JSON_MEDIA_TYPES)
+
+def negotiated_response(request: Request, content: Any) -> Response:
+    """MessagePack if the client asked for it, otherwise JSON encoded with orjson."""
+    if wants_msgpack(request.headers.get("accept")):
+        return MsgpackResponse(content)
+    return ORJSONResponse(content)
+
+def encode_stream(rows: Iterable[Iterable[Any]], binary: bool) -> Iterator[bytes]:
+    """Encode chunks of rows as NDJSON, or as a stream of concatenated MessagePack objects."""
+    if binary:
+        packer = msgpack.Packer(use_bin_type=True)
+        for chunk in rows:
+            yield b"".join(packer.pack(row) for row in chunk)
+    else:
+        for chunk in rows:
+            yield b"".join(orjson.dumps(row) + b"\n" for row in chunk)
@@ -0,0 +1,164 @@
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+import numpy as np
+from skyfield.api import Loader, load_file
+from ephemeris_table import load_table
+import config
+
+logger = logging.getLogger(__name__)
+
+# Skyfield target names for every body in a chart, in output order
+PLANET_TARGETS = {
+    'sun': 'sun',
+    'moon': 'moon',
+    'mercury': 'mercury',
+    'venus': 'venus',
+    'mars': 'mars',
+    'jupiter': 'jupiter barycenter',
+    'saturn': 'saturn barycenter',
+    'uranus': 'uranus barycenter',
+    'neptune': 'neptune barycenter',
+    'pluto': 'pluto barycenter'
+}
+
+# Light time to the outer planets and finite-difference steps reach hours past
+# the requested instant, so dates this close to either end of the kernel are refused
+COVERAGE_MARGIN_DAYS = 1.0
+
+class EphemerisNotReadyError(RuntimeError):
+    """Raised when the ephemeris is used before it has been loaded."""
+    pass
+
+class EphemerisRegistry:
+    """Holds the SPK kernel, timescale and body lookups for this worker.
+
+    Opening and parsing the kernel is by far the most expensive part of a
+    chart calculation, so it is done once per process and the resulting
+    objects are shared by every request.
+    """
+
+    def __init__(self, directory: str = config.EPHEMERIS_DIR, filename: str = config.EPHEMERIS_FILE,
+                 table_path: str = config.EPHEMERIS_TABLE_PATH,
+                 excerpt_path: str = config.EPHEMERIS_EXCERPT_PATH):
+        self.directory = directory
+        self.filename = filename
+        self.table_path = table_path
+        self.excerpt_path = excerpt_path
+        self.source: Optional[str] = None
+        self._lock = threading.Lock()
+        self._ts = None
+        self._eph = None
+        self._earth = None
+        self._planets: Dict[str, object] = {}
+        self._table = None
+        self._coverage: Optional[Tuple[float, float]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._eph is not None
+
+    def load(self) -> "EphemerisRegistry":
+        """Load the kernel and build the body lookups, once."""
+        if self.ready:
+            return self
+        with self._lock:
+            if self.ready:
+                return self
+            loader = Loader(self.directory)
+            ts = loader.timescale()
+            if os.path.exists(self.excerpt_path):
+                logger.info(f"Memory-mapping ephemeris excerpt {self.excerpt_path}")
+                eph = load_file(self.excerpt_path)
+                self.source = self.excerpt_path
+            else:
+                logger.info(f"Loading ephemeris {self.filename} from {self.directory}")
+                eph = loader(self.filename)
+                self.source = os.path.join(self.directory, self.filename)
+            self._planets = {name: eph[target] for name, target in PLANET_TARGETS.items()}
+            self._earth = eph['earth']
+            self._table = self._load_table()
+            # Every segment must cover a date for all bodies to be computable then
+            segments = eph.spk.segments
+            self._coverage = (
+                max(segment.start_jd for segment in segments) + COVERAGE_MARGIN_DAYS,
+                min(segment.end_jd for segment in segments) - COVERAGE_MARGIN_DAYS
+            )
+            self._ts = ts
+            self._eph = eph
+            logger.info("Ephemeris loaded")
+        return self
+
+    def _load_table(self):
+        table = load_table(self.table_path)
+        if table is not None and table.bodies != list(PLANET_TARGETS):
+            logger.warning(f"Ignoring ephemeris table {self.table_path}: body list does not match")
+            return None
+        if table is not None:
+            logger.info(f"Memory-mapped ephemeris table {self.table_path}")
+        return table
+
+    def _require(self, value):
+        if value is None:
+            raise EphemerisNotReadyError("Ephemeris has not been loaded")
+        return value
+
+    @property
+    def ts(self):
+        return self._require(self._ts)
+
+    @property
+    def eph(self):
+        return self._require(self._eph)
+
+    @property
+    def earth(self):
+        return self._require(self._earth)
+
+    @property
+    def planets(self) -> Dict[str, object]:
+        self._require(self._eph)
+        return self._planets
+
+    @property
+    def table(self):
+        """The precomputed position table, or None when it has not been built."""
+        self._require(self._eph)
+        return self._table
+
+    @property
+    def coverage(self) -> Tuple[float, float]:
+        """First and last TDB Julian date every body can be computed for."""
+        return self._require(self._coverage)
+
+    def covers(self, t) -> np.ndarray:
+        """Whether each time of ``t`` lies inside the kernel's coverage."""
+        first, last = self.coverage
+        return (t.tdb >= first) & (t.tdb <= last)
+
+    def coverage_error(self) -> ValueError:
+        first, last = (self.ts.tdb_jd(jd).utc_strftime('%Y-%m-%d') for jd in self.coverage)
+        return ValueError(f"Date is outside the ephemeris range {first} to {last}")
+
+    def require_coverage(self, t):
+        """Raise ValueError unless every time of ``t`` lies inside the kernel's coverage."""
+        if not np.all(self.covers(t)):
+            raise self.coverage_error()
+
+_registry: Optional[EphemerisRegistry] = None
+
+def get_registry() -> EphemerisRegistry:
+    """Return the process-wide registry without loading it."""
+    global _registry
+    if _registry is None:
+        _registry = EphemerisRegistry()
+    return _registry
+
+def get_ephemeris() -> EphemerisRegistry:
+    """Return the process-wide registry, loading the kernel on first use."""
+    return get_registry().load()
+
+def is_ready() -> bool:
+    """Whether the kernel has been loaded in this worker."""
+    return get_registry().ready
@@ -0,0 +1,86 @@
+"""Date-range excerpt of the SPK kernel holding only the segments the service uses.
+
+The excerpt keeps the segments on the path from the solar system barycenter
+to the Earth and to every chart body, clipped to a date window, and is
+written read-only. jplephem memory-maps SPK segment data, so when every
+worker opens the same excerpt the kernel pages are shared through the page
+cache instead of each worker reading its own copy. Charts outside the window
+fail with an out-of-range error, so build it to cover every birth date the
+service must accept.
+
+Build from the astrology-service directory:
+
+    python ephemeris_excerpt.py --start 1900-01-01 --end 2050-01-01 --output ephemeris_excerpt.bsp
+"""
+import argparse
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, Set, Tuple
+from jplephem.excerpter import write_excerpt
+from jplephem.spk import SPK
+from skyfield.api import load, load_file
+from ephemeris import PLANET_TARGETS
+import config
+
+def required_segments(kernel_path: str) -> Set[Tuple[int, int]]:
+    """``(center, target)`` of every segment needed for the Earth and the chart bodies."""
+    kernel = load_file(kernel_path)
+    pairs = set()
+    for target in ['earth', *PLANET_TARGETS.values()]:
+        vector = kernel[target]
+        # Targets relative to the barycenter are a single segment, others a chain
+        for segment in getattr(vector, 'vector_functions', [vector]):
+            pairs.add((segment.center, segment.target))
+    return pairs
+
+def build_excerpt(kernel_path: str, output_path: str, start: datetime, end: datetime) -> Dict:
+    """Write the excerpt for ``start``..``end`` to ``output_path`` and return a summary."""
+    ts = load.timescale()
+    start_jd = ts.from_datetime(start.replace(tzinfo=timezone.utc)).tdb
+    end_jd = ts.from_datetime(end.replace(tzinfo=timezone.utc)).tdb
+    needed = required_segments(kernel_path)
+
+    spk = SPK.open(kernel_path)
+    try:
+        summaries = [
+            summary for summary, segment in zip(spk.daf.summaries(), spk.segments)
+            if (segment.center, segment.target) in needed
+        ]
+        temporary = f"{output_path}.tmp"
+        with open(temporary, 'w+b') as f:
+            write_excerpt(spk, f, start_jd, end_jd, summaries)
+    finally:
+        spk.close()
+    if os.path.exists(output_path):
+        os.chmod(output_path, 0o644)
+    os.replace(temporary, output_path)
+    os.chmod(output_path, 0o444)
+    return {
+        'segments': len(summaries),
+        'start_jd': start_jd,
+        'end_jd': end_jd,
+        'bytes': os.path.getsize(output_path)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the shared ephemeris kernel excerpt.")
+    parser.add_argument("--kernel", default=os.path.join(config.EPHEMERIS_DIR, config.EPHEMERIS_FILE))
+    parser.add_argument("--start", default="1900-01-01", help="First date, YYYY-MM-DD")
+    parser.add_argument("--end", default="2050-01-01", help="Last date, YYYY-MM-DD")
+    parser.add_argument("--output", default=config.EPHEMERIS_EXCERPT_PATH)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    summary = build_excerpt(
+        args.kernel,
+        args.output,
+        datetime.strptime(args.start, "%Y-%m-%d"),
+        datetime.strptime(args.end, "%Y-%m-%d")
+    )
+    size_mb = summary['bytes'] / (1024 * 1024)
+    print(f"Wrote {summary['segments']} segments to {args.output} ({size_mb:.1f} MB, "
+          f"{os.path.getsize(args.kernel) / (1024 * 1024):.1f} MB kernel)")
+
+if __name__ == "__main__":
+    main()
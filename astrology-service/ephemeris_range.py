@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Sequence
+import numpy as np
+from calculations import geocentric_planet_vectors, positions_to_radec
+from ephemeris import get_ephemeris
+from zodiac import zodiac_longitude
+import config
+
+class EphemerisRange:
+    """A validated ``(start, end, step)`` grid that yields geocentric positions chunk by chunk.
+
+    Only one chunk of Skyfield times and positions exists at a time, so memory
+    stays flat however long the range is.
+    """
+
+    def __init__(self, start: datetime, end: datetime, step_minutes: float,
+                 bodies: Optional[Sequence[str]] = None, chunk_size: int = config.EPHEMERIS_RANGE_CHUNK_SIZE):
+        start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+        end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+        if end < start:
+            raise ValueError("end must not be before start")
+        if step_minutes <= 0:
+            raise ValueError("step_minutes must be positive")
+        self.ephemeris = get_ephemeris()
+        # Checked here so callers can reject the range before streaming starts
+        self.ephemeris.require_coverage(self.ephemeris.ts.from_datetimes([start, end]))
+        all_names = list(self.ephemeris.planets)
+        self.names: List[str] = list(bodies or all_names)
+        unknown = set(self.names) - set(all_names)
+        if unknown:
+            raise ValueError(f"Unknown bodies: {', '.join(sorted(unknown))}")
+        self.selected = np.array([all_names.index(name) for name in self.names])
+        self.step_seconds = step_minutes * 60.0
+        self.count = int((end - start).total_seconds() // self.step_seconds) + 1
+        if self.count > config.EPHEMERIS_RANGE_MAX_POINTS:
+            raise ValueError(
+                f"Range has {self.count} steps (max {config.EPHEMERIS_RANGE_MAX_POINTS})"
+            )
+        self.start = start.astimezone(timezone.utc)
+        self.chunk_size = chunk_size
+
+    def chunks(self) -> Iterator[List[Dict]]:
+        """Yield lists of ``{'time', 'positions'}`` rows, ``chunk_size`` steps at a time."""
+        for offset in range(0, self.count, self.chunk_size):
+            # Civil UTC steps, so leap seconds don't drift the grid off round times
+            moments = [
+                self.start + timedelta(seconds=step * self.step_seconds)
+                for step in range(offset, min(offset + self.chunk_size, self.count))
+            ]
+            t = self.ephemeris.ts.from_datetimes(moments)
+            xyz = geocentric_planet_vectors(self.ephemeris, t)[self.selected]
+            ra, dec, distance = (values.tolist() for values in positions_to_radec(xyz))
+            longitude = zodiac_longitude(xyz, t).tolist()
+            yield [
+                {
+                    'time': moment.isoformat(),
+                    'positions': {
+                        name: {
+                            'ra': ra[b][k],
+                            'dec': dec[b][k],
+                            'distance': distance[b][k],
+                            'longitude': longitude[b][k]
+                        }
+                        for b, name in enumerate(self.names)
+                    }
+                }
+                for k, moment in enumerate(moments)
+            ]
@@ -0,0 +1,208 @@
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from calculations import geocentric_planet_vectors
+from aspects import ASPECTS
+from ephemeris import get_ephemeris
+from zodiac import SIGNS, zodiac_longitude
+import config
+
+EVENT_TYPES = ('ingress', 'station', 'aspect')
+
+# Finite-difference step for daily motion, in days
+SPEED_STEP_DAYS = 1.0 / 24.0
+
+ROOT_MAX_ITERATIONS = 50
+
+def _wrap(degrees: np.ndarray) -> np.ndarray:
+    """Wrap angles into [-180, 180)."""
+    return (degrees + 180.0) % 360.0 - 180.0
+
+def body_longitudes(ephemeris, tt: np.ndarray) -> np.ndarray:
+    """Longitude (degrees) of every body at TT Julian dates ``tt``, shape ``(n_bodies, *tt.shape)``.
+
+    Longitudes are in the configured zodiac, so ingresses match the signs
+    returned with each chart.
+    """
+    t = ephemeris.ts.tt_jd(tt)
+    return zodiac_longitude(geocentric_planet_vectors(ephemeris, t), t)
+
+def body_speeds(ephemeris, tt: np.ndarray) -> np.ndarray:
+    """Daily motion (degrees per day) of every body, shape ``(n_bodies, *tt.shape)``."""
+    ahead = body_longitudes(ephemeris, tt + SPEED_STEP_DAYS / 2)
+    behind = body_longitudes(ephemeris, tt - SPEED_STEP_DAYS / 2)
+    return _wrap(ahead - behind) / SPEED_STEP_DAYS
+
+def find_roots(f: Callable[[np.ndarray], np.ndarray], lo: np.ndarray, hi: np.ndarray,
+               tolerance_days: float) -> np.ndarray:
+    """Roots of ``f`` inside every bracket ``[lo, hi]`` at once.
+
+    ``f`` maps an array of TT dates to one value per bracket and must change
+    sign across each bracket. Regula falsi with the Illinois modification
+    keeps every root bracketed while converging in a handful of steps, and
+    all brackets advance together so each step is one vectorized ephemeris
+    evaluation.
+    """
+    if not lo.size:
+        return lo
+    lo, hi = lo.copy(), hi.copy()
+    f_lo, f_hi = f(lo), f(hi)
+    side = np.zeros(lo.shape, dtype=int)
+    x = lo
+    for _ in range(ROOT_MAX_ITERATIONS):
+        previous = x
+        x = hi - f_hi * (hi - lo) / (f_hi - f_lo)
+        f_x = f(x)
+        right = np.signbit(f_x) == np.signbit(f_lo)
+        # An endpoint kept twice in a row has its value halved (Illinois)
+        f_hi = np.where(right & (side == 1), f_hi / 2, f_hi)
+        f_lo = np.where(~right & (side == -1), f_lo / 2, f_lo)
+        lo, f_lo = np.where(right, x, lo), np.where(right, f_x, f_lo)
+        hi, f_hi = np.where(right, hi, x), np.where(right, f_hi, f_x)
+        side = np.where(right, 1, -1)
+        if np.max(np.abs(x - previous)) < tolerance_days:
+            break
+    return x
+
+def _find_ingresses(ephemeris, names, bodies, tt, longitudes, tolerance_days) -> List[Dict]:
+    signs = (longitudes // 30.0).astype(int) % 12
+    body, step = np.nonzero(signs[:, :-1] != signs[:, 1:])
+    before, after = signs[body, step], signs[body, step + 1]
+    # Moving forward the boundary is the start of the new sign, backward that of the old one
+    retrograde = ((after - before) % 12) == 11
+    boundary = np.where(retrograde, before, after) * 30.0
+    index = np.arange(len(body))
+
+    def f(when):
+        return _wrap(body_longitudes(ephemeris, when)[bodies[body], index] - boundary)
+
+    roots = find_roots(f, tt[step], tt[step + 1], tolerance_days)
+    return [
+        {
+            'type': 'ingress',
+            'tt': roots[k],
+            'body': names[body[k]],
+            'sign': SIGNS[after[k]],
+            'from_sign': SIGNS[before[k]],
+            'retrograde': bool(retrograde[k])
+        }
+        for k in range(len(body))
+    ]
+
+def _find_stations(ephemeris, names, bodies, tt, speeds, tolerance_days) -> List[Dict]:
+    body, step = np.nonzero(np.signbit(speeds[:, :-1]) != np.signbit(speeds[:, 1:]))
+    turning_retrograde = speeds[body, step + 1] < 0
+    index = np.arange(len(body))
+
+    def f(when):
+        return body_speeds(ephemeris, when)[bodies[body], index]
+
+    roots = find_roots(f, tt[step], tt[step + 1], tolerance_days)
+    longitudes = body_longitudes(ephemeris, roots)[bodies[body], index] if len(body) else ()
+    return [
+        {
+            'type': 'station',
+            'tt': roots[k],
+            'body': names[body[k]],
+            'station': 'retrograde' if turning_retrograde[k] else 'direct',
+            'longitude': float(longitudes[k])
+        }
+        for k in range(len(body))
+    ]
+
+def _find_aspects(ephemeris, names, bodies, tt, longitudes, aspect_names, tolerance_days) -> List[Dict]:
+    first, second = np.triu_indices(len(names), k=1)
+    # An aspect of angle A is exact when the signed difference reaches +A or -A
+    targets, target_aspects = [], []
+    for name in aspect_names:
+        angle = ASPECTS[name][0]
+        for target in (angle, -angle) if 0.0 < angle < 180.0 else (angle,):
+            targets.append(target)
+            target_aspects.append(name)
+    targets = np.array(targets)
+
+    difference = _wrap(longitudes[first] - longitudes[second])
+    offset = _wrap(difference[:, np.newaxis, :] - targets[np.newaxis, :, np.newaxis])
+    # A sign change far from zero is the wrap-around at +-180, not an exact aspect
+    crossing = (np.signbit(offset[..., :-1]) != np.signbit(offset[..., 1:])) & \
+               (np.abs(offset[..., :-1]) < 90.0) & (np.abs(offset[..., 1:]) < 90.0)
+    pair, target, step = np.nonzero(crossing)
+    index = np.arange(len(pair))
+
+    def f(when):
+        values = body_longitudes(ephemeris, when)
+        a = values[bodies[first[pair]], index]
+        b = values[bodies[second[pair]], index]
+        return _wrap(_wrap(a - b) - targets[target])
+
+    roots = find_roots(f, tt[step], tt[step + 1], tolerance_days)
+    return [
+        {
+            'type': 'aspect',
+            'tt': roots[k],
+            'body1': names[first[pair[k]]],
+            'body2': names[second[pair[k]]],
+            'aspect': target_aspects[target[k]],
+            'angle': ASPECTS[target_aspects[target[k]]][0]
+        }
+        for k in range(len(pair))
+    ]
+
+def find_events(start: datetime, end: datetime, types: Optional[Sequence[str]] = None,
+                bodies: Optional[Sequence[str]] = None, aspects: Optional[Sequence[str]] = None,
+                step_hours: float = config.EVENT_SEARCH_STEP_HOURS,
+                tolerance_seconds: float = config.EVENT_SEARCH_TOLERANCE_SECONDS) -> List[Dict]:
+    """All ingresses, stations and exact aspects between ``start`` and ``end``, in time order.
+
+    Longitudes are sampled every ``step_hours`` in one array, and each change
+    seen between two samples is refined by bracketed root finding. Events closer together
+    than one step for the same body (or pair) may be missed, so the step must
+    stay well below the time the Moon needs to cross a sign.
+    """
+    types = list(types or EVENT_TYPES)
+    aspects = list(aspects or [name for name, (_, _, major) in ASPECTS.items() if major])
+    unknown = set(types) - set(EVENT_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown event types: {', '.join(sorted(unknown))}")
+    unknown = set(aspects) - set(ASPECTS)
+    if unknown:
+        raise ValueError(f"Unknown aspects: {', '.join(sorted(unknown))}")
+    start = start if start.tzinfo else start.replace(tzinfo=timezone.utc)
+    end = end if end.tzinfo else end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        raise ValueError("end must be after start")
+    if (end - start).total_seconds() > config.EVENT_SEARCH_MAX_DAYS * 86400:
+        raise ValueError(f"Search range is limited to {config.EVENT_SEARCH_MAX_DAYS} days")
+
+    ephemeris = get_ephemeris()
+    all_names = list(ephemeris.planets)
+    names = list(bodies or all_names)
+    unknown = set(names) - set(all_names)
+    if unknown:
+        raise ValueError(f"Unknown bodies: {', '.join(sorted(unknown))}")
+    selected = np.array([all_names.index(name) for name in names])
+
+    first, last = ephemeris.ts.from_datetimes([start, end]).tt
+    # Checked up front: unlike Skyfield's range error, this ValueError survives the trip back from a chart process
+    ephemeris.require_coverage(ephemeris.ts.tt_jd(np.array([first - SPEED_STEP_DAYS, last + SPEED_STEP_DAYS])))
+    count = int(np.ceil((last - first) * 24.0 / step_hours)) + 1
+    tt = np.linspace(first, last, count)
+    tolerance_days = tolerance_seconds / 86400.0
+    longitudes = body_longitudes(ephemeris, tt)[selected]
+
+    events = []
+    if 'ingress' in types:
+        events += _find_ingresses(ephemeris, names, selected, tt, longitudes, tolerance_days)
+    if 'station' in types:
+        speeds = body_speeds(ephemeris, tt)[selected]
+        events += _find_stations(ephemeris, names, selected, tt, speeds, tolerance_days)
+    if 'aspect' in types and len(names) > 1:
+        events += _find_aspects(ephemeris, names, selected, tt, longitudes, aspects, tolerance_days)
+
+    events.sort(key=lambda event: event['tt'])
+    if events:
+        times = ephemeris.ts.tt_jd(np.array([event['tt'] for event in events])).utc_datetime()
+        for event, moment in zip(events, times):
+            event['time'] = moment.isoformat()
+            event['tt'] = float(event['tt'])
+    return events
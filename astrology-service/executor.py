@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, List, Optional
+from ephemeris import get_ephemeris
+import config
+
+logger = logging.getLogger(__name__)
+
+class ChartQueueFullError(Exception):
+    """Raised when the process pool already has as many charts as it may queue."""
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Chart calculation queue is full")
+
+def _init_worker():
+    """Load the ephemeris in each worker process before it takes any work."""
+    get_ephemeris()
+
+def _warm_up() -> bool:
+    return True
+
+class ChartExecutor:
+    """Runs CPU-heavy chart calculations inline or in a bounded process pool.
+
+    In ``process`` mode at most ``queue_size`` calculations are running or
+    waiting at once; beyond that ``run`` fails fast with ``ChartQueueFullError``
+    so the endpoint can answer 429 instead of piling up work.
+    """
+
+    def __init__(self, mode: str = config.CHART_EXECUTOR, workers: int = config.CHART_WORKERS,
+                 queue_size: int = config.CHART_QUEUE_SIZE,
+                 retry_after: int = config.CHART_RETRY_AFTER_SECONDS):
+        if mode not in ('inline', 'process'):
+            raise ValueError(f"Unknown chart executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._started = mode == 'inline'
+
+    async def start(self):
+        """Start the worker processes and wait until each has loaded the ephemeris."""
+        if self.mode != 'process' or self._pool is not None:
+            return
+        logger.info(f"Starting chart process pool with {self.workers} workers")
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._pool, _warm_up) for _ in range(self.workers)))
+        self._started = True
+        logger.info("Chart process pool ready")
+
+    @property
+    def ready(self) -> bool:
+        """True once every worker has loaded the ephemeris (always true inline)."""
+        return self._started
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+            self._started = False
+
+    def worker_pids(self) -> List[int]:
+        if self._pool is None:
+            return []
+        return sorted(self._pool._processes or {})
+
+    def stats(self) -> dict:
+        return {
+            'mode': self.mode,
+            'workers': self.workers if self.mode == 'process' else 0,
+            'queue_size': self.queue_size,
+            'in_flight': self.in_flight,
+            'rejected': self.rejected
+        }
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Call ``func(*args)``, in a worker process when the pool is enabled."""
+        if self._pool is None:
+            return func(*args)
+        if self.in_flight >= self.queue_size:
+            self.rejected += 1
+            raise ChartQueueFullError(self.retry_after)
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, func, *args)
+        finally:
+            self.in_flight -= 1
+
+chart_executor = ChartExecutor()
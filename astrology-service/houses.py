@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Tuple
+import numpy as np
+from skyfield.nutationlib import iau2000b_radians, mean_obliquity
+import config
+
+HOUSE_SYSTEMS = ('placidus', 'sripathi', 'porphyry')
+
+# Semi-arc iteration stops once every cusp moves less than the tolerance (radians)
+PLACIDUS_MAX_ITERATIONS = 50
+PLACIDUS_TOLERANCE = 1e-10
+
+class SiderealTimeCache:
+    """Greenwich apparent sidereal time, true obliquity and nutation in longitude, cached per timestamp.
+
+    All three need the nutation series, which dominates the cost of a house
+    calculation. Values are keyed on the TT Julian date, and for a time array
+    only the timestamps not seen before are evaluated, in one vectorized call.
+    """
+
+    def __init__(self, max_size: int = config.SIDEREAL_TIME_CACHE_SIZE):
+        self.max_size = max_size
+        self._values: "OrderedDict[float, Tuple[float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, t) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return ``(gast, true_obliquity, nutation_in_longitude)`` in degrees, with the shape of ``t``."""
+        keys = np.atleast_1d(t.tt).ravel().tolist()
+        with self._lock:
+            missing = [i for i, key in enumerate(keys) if key not in self._values]
+            if missing:
+                subset = t if t.shape == () else t[np.array(missing)]
+                gast = np.atleast_1d(subset.gast * 15.0)
+                dpsi, deps = iau2000b_radians(subset)
+                obliquity = np.atleast_1d(mean_obliquity(subset.tdb) / 3600.0 + np.degrees(deps))
+                dpsi = np.atleast_1d(np.degrees(dpsi))
+                for j, i in enumerate(missing):
+                    self._values[keys[i]] = (float(gast[j]), float(obliquity[j]), float(dpsi[j]))
+            values = []
+            for key in keys:
+                self._values.move_to_end(key)
+                values.append(self._values[key])
+            while len(self._values) > self.max_size:
+                self._values.popitem(last=False)
+        gast, obliquity, dpsi = np.array(values).T
+        return gast.reshape(t.shape), obliquity.reshape(t.shape), dpsi.reshape(t.shape)
+
+sidereal_times = SiderealTimeCache()
+
+def _ecliptic_longitude_of_ra(ra, eps):
+    """Longitude of the ecliptic point with right ascension ``ra`` (all in radians)."""
+    return np.arctan2(np.sin(ra), np.cos(ra) * np.cos(eps))
+
+def angles(ramc: np.ndarray, obliquity: np.ndarray, latitude: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Ascendant and midheaven longitudes (degrees) from RAMC, obliquity and latitude (degrees)."""
+    ramc, eps, phi = np.radians(ramc), np.radians(obliquity), np.radians(latitude)
+    ascendant = np.arctan2(np.cos(ramc), -(np.sin(ramc) * np.cos(eps) + np.tan(phi) * np.sin(eps)))
+    midheaven = _ecliptic_longitude_of_ra(ramc, eps)
+    return np.degrees(ascendant) % 360.0, np.degrees(midheaven) % 360.0
+
+def porphyry_cusps(ascendant: np.ndarray, midheaven: np.ndarray) -> np.ndarray:
+    """Cusps (degrees) trisecting each quadrant, shape ``(12, ...)`` starting with house 1."""
+    eastern = (ascendant - midheaven) % 360.0      # MC -> Asc, houses 10-12
+    lower = 180.0 - eastern                        # Asc -> IC, houses 1-3
+    cusps = np.empty((12,) + np.shape(ascendant))
+    for k in range(3):
+        cusps[k] = ascendant + k * lower / 3.0
+        cusps[k + 9] = midheaven + k * eastern / 3.0
+    cusps[3:9] = cusps[[9, 10, 11, 0, 1, 2]] + 180.0
+    return cusps % 360.0
+
+def placidus_cusps(ramc: np.ndarray, obliquity: np.ndarray, latitude: np.ndarray,
+                   ascendant: np.ndarray, midheaven: np.ndarray) -> np.ndarray:
+    """Placidus cusps (degrees), shape ``(12, ...)``, by semi-arc iteration.
+
+    Placidus is undefined inside the polar circles; there the Porphyry cusps
+    are returned instead.
+    """
+    ramc_r, eps, phi = np.radians(ramc), np.radians(obliquity), np.radians(latitude)
+    tan_phi = np.tan(phi)
+
+    def cusp(base, sign, fraction, diurnal):
+        # Right ascension of the cusp moves with the ascensional difference of
+        # the cusp itself, so iterate from the equal-division starting point
+        ra = base + sign * fraction * np.pi / 2
+        for _ in range(PLACIDUS_MAX_ITERATIONS):
+            longitude = _ecliptic_longitude_of_ra(ra, eps)
+            declination = np.arcsin(np.sin(eps) * np.sin(longitude))
+            ascensional = np.arcsin(np.clip(tan_phi * np.tan(declination), -1.0, 1.0))
+            semi_arc = np.pi / 2 + ascensional if diurnal else np.pi / 2 - ascensional
+            previous, ra = ra, base + sign * fraction * semi_arc
+            if np.all(np.abs(ra - previous) < PLACIDUS_TOLERANCE):
+                break
+        return np.degrees(_ecliptic_longitude_of_ra(ra, eps)) % 360.0
+
+    cusps = np.empty((12,) + np.shape(ramc))
+    cusps[0] = ascendant
+    cusps[9] = midheaven
+    cusps[10] = cusp(ramc_r, 1, 1 / 3, True)
+    cusps[11] = cusp(ramc_r, 1, 2 / 3, True)
+    cusps[1] = cusp(ramc_r + np.pi, -1, 2 / 3, False)
+    cusps[2] = cusp(ramc_r + np.pi, -1, 1 / 3, False)
+    cusps[3:9] = cusps[[9, 10, 11, 0, 1, 2]] + 180.0
+    cusps %= 360.0
+
+    polar = np.abs(latitude) >= 90.0 - obliquity
+    if np.any(polar):
+        cusps = np.where(polar, porphyry_cusps(ascendant, midheaven), cusps)
+    return cusps
+
+def sripathi_houses(ascendant: np.ndarray, midheaven: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sripathi bhavas: ``(cusps, midpoints)``, each ``(12, ...)``.
+
+    The bhava midpoints are the Porphyry points (the ascendant is the middle
+    of the first house) and each cusp lies halfway between adjacent midpoints.
+    """
+    midpoints = porphyry_cusps(ascendant, midheaven)
+    previous = np.roll(midpoints, 1, axis=0)
+    cusps = (previous + ((midpoints - previous) % 360.0) / 2.0) % 360.0
+    return cusps, midpoints
+
+def compute_houses(t, latitude, longitude, system: str = config.HOUSE_SYSTEM) -> Dict[str, np.ndarray]:
+    """Ascendant, MC and cusps for Skyfield time ``t`` and observer coordinates in degrees.
+
+    ``t``, ``latitude`` and ``longitude`` may be arrays of the same shape;
+    cusps come back with shape ``(12, *t.shape)``. Longitudes are tropical,
+    measured from the true equinox of date.
+    """
+    if system not in HOUSE_SYSTEMS:
+        raise ValueError(f"Unknown house system: {system}")
+    gast, obliquity, _ = sidereal_times.get(t)
+    latitude = np.asarray(latitude, dtype=float)
+    ramc = (gast + np.asarray(longitude, dtype=float)) % 360.0
+    ascendant, midheaven = angles(ramc, obliquity, latitude)
+
+    result = {'ascendant': ascendant, 'mc': midheaven, 'ramc': ramc}
+    if system == 'placidus':
+        result['cusps'] = placidus_cusps(ramc, obliquity, latitude, ascendant, midheaven)
+    elif system == 'sripathi':
+        result['cusps'], result['midpoints'] = sripathi_houses(ascendant, midheaven)
+    else:
+        result['cusps'] = porphyry_cusps(ascendant, midheaven)
+    return result
+
+def houses_to_dict(houses: Dict[str, np.ndarray], system: str, index=()) -> Dict:
+    """JSON-ready houses for one chart; ``index`` selects the chart within a batch."""
+    result = {
+        'system': system,
+        'ascendant': float(houses['ascendant'][index]),
+        'mc': float(houses['mc'][index]),
+        'cusps': {str(house + 1): float(houses['cusps'][(house,) + index]) for house in range(12)}
+    }
+    if 'midpoints' in houses:
+        result['midpoints'] = {str(house + 1): float(houses['midpoints'][(house,) + index]) for house in range(12)}
+    return result
@@ -1,9 +1,91 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from datetime import datetime
-from calculations import calculate_birth_chart
+from typing import Dict, List, Optional
+from calculations import calculate_birth_chart, calculate_birth_charts
+from ephemeris import get_ephemeris, get_registry, is_ready
+from transits import calculate_transits
+from events import find_events
+from ephemeris_range import EphemerisRange
+from executor import ChartQueueFullError, chart_executor
+from memory import process_memory
+from encoding import encode_stream, negotiated_response, wants_msgpack, MSGPACK_MEDIA_TYPE
+import config
+import logging
 
-app = FastAPI(title="Astrology Calculation Service")
+logger = logging.getLogger(__name__)
+
+startup_error: Optional[str] = None
+
+async def _warm_up():
+    """Load the ephemeris off the event loop, then start the chart workers."""
+    global startup_error
+    try:
+        logger.info("Loading ephemeris...")
+        await asyncio.get_running_loop().run_in_executor(None, get_ephemeris)
+        logger.info("Ephemeris ready")
+        await chart_executor.start()
+    except Exception as e:
+        startup_error = str(e)
+        logger.exception("Warm-up failed")
+        raise
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the ephemeris once per worker, before serving or in the background; stop the chart workers on shutdown."""
+    if config.STARTUP_MODE == "background":
+        app.state.warm_up = asyncio.create_task(_warm_up())
+    else:
+        await _warm_up()
+    yield
+    chart_executor.shutdown()
+
+app = FastAPI(title="Astrology Calculation Service", default_response_class=ORJSONResponse, lifespan=lifespan)
+
+def _service_ready() -> bool:
+    return is_ready() and chart_executor.ready
+
+def require_ready():
+    """Reject calculations with 503 while the background warm-up is still running."""
+    if not _service_ready():
+        raise HTTPException(
+            status_code=503,
+            detail="Service is starting",
+            headers={"Retry-After": str(config.CHART_RETRY_AFTER_SECONDS)}
+        )
+
+def _queue_full(error: ChartQueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+@app.get("/health")
+async def health():
+    """Liveness check; reports "starting" until the warm-up has finished."""
+    if startup_error is not None:
+        raise HTTPException(status_code=503, detail=f"Warm-up failed: {startup_error}")
+    return {"status": "ok" if _service_ready() else "starting"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness check; fails until the ephemeris kernel is loaded and the workers are up."""
+    if not _service_ready():
+        raise HTTPException(status_code=503, detail="Ephemeris not loaded")
+    return {"status": "ready", "executor": chart_executor.stats()}
+
+@app.get("/memory")
+async def memory():
+    """Resident memory of this worker and of its chart processes, with the kernel file in use."""
+    return {
+        "ephemeris": get_registry().source,
+        "process": process_memory(),
+        "workers": [process_memory(pid) for pid in chart_executor.worker_pids()]
+    }
 
 class BirthData(BaseModel):
     birth_date: str  # Format: YYYY-MM-DD
@@ -12,16 +94,112 @@ class BirthData(BaseModel):
     longitude: float
     timezone: str
 
-@app.post("/calculate-chart")
-async def calculate_chart(birth_data: BirthData):
+@app.post("/calculate-chart", dependencies=[Depends(require_ready)])
+async def calculate_chart(birth_data: BirthData, http_request: Request):
     try:
-        chart_data = calculate_birth_chart(
-            birth_date=birth_data.birth_date,
-            birth_time=birth_data.birth_time,
-            latitude=birth_data.latitude,
-            longitude=birth_data.longitude,
-            timezone=birth_data.timezone
+        chart_data = await chart_executor.run(
+            calculate_birth_chart,
+            birth_data.birth_date,
+            birth_data.birth_time,
+            birth_data.latitude,
+            birth_data.longitude,
+            birth_data.timezone
         )
-        return chart_data
+    except ChartQueueFullError as e:
+        raise _queue_full(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    return negotiated_response(http_request, chart_data)
+
+class BatchBirthData(BaseModel):
+    records: List[BirthData]
+
+class BatchChartResult(BaseModel):
+    index: int
+    chart: Optional[dict] = None
+    error: Optional[str] = None
+
+class BatchChartResponse(BaseModel):
+    results: List[BatchChartResult]
+
+@app.post("/calculate-charts", response_model=BatchChartResponse, dependencies=[Depends(require_ready)])
+async def calculate_charts(batch: BatchBirthData, http_request: Request):
+    """Calculate many charts in one vectorized pass, returning results in input order."""
+    if len(batch.records) > config.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(batch.records)} records (max {config.MAX_BATCH_SIZE})"
+        )
+    try:
+        results = await chart_executor.run(calculate_birth_charts, [record.dict() for record in batch.records])
+    except ChartQueueFullError as e:
+        raise _queue_full(e)
+    return negotiated_response(http_request, {
+        "results": [{"index": index, **result} for index, result in enumerate(results)]
+    })
+
+class NatalPosition(BaseModel):
+    ra: float  # Hours
+    dec: float  # Degrees
+    distance: Optional[float] = None
+    # Degrees, as returned with the chart; used instead of RA/Dec when present
+    longitude: Optional[float] = None
+    sidereal_longitude: Optional[float] = None
+
+class TransitRequest(BaseModel):
+    planet_positions: Dict[str, NatalPosition]
+    at: Optional[datetime] = None  # Defaults to now
+
+@app.post("/chart/{chart_id}/transits", dependencies=[Depends(require_ready)])
+async def chart_transits(chart_id: str, request: TransitRequest, http_request: Request):
+    """Compare the shared sky snapshot for the current slot with one natal chart."""
+    if not request.planet_positions:
+        raise HTTPException(status_code=400, detail="planet_positions must not be empty")
+    try:
+        transits = calculate_transits(
+            {name: position.dict() for name, position in request.planet_positions.items()},
+            request.at
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return negotiated_response(http_request, {"chart_id": chart_id, **transits})
+
+class EventSearchRequest(BaseModel):
+    start: datetime
+    end: datetime
+    types: Optional[List[str]] = None  # ingress, station, aspect; all by default
+    bodies: Optional[List[str]] = None
+    aspects: Optional[List[str]] = None  # major aspects by default
+
+@app.post("/events", dependencies=[Depends(require_ready)])
+async def search_events(request: EventSearchRequest, http_request: Request):
+    """Sign ingresses, stations and exact aspects between two instants, in time order."""
+    try:
+        events = await chart_executor.run(
+            find_events, request.start, request.end, request.types, request.bodies, request.aspects
+        )
+    except ChartQueueFullError as e:
+        raise _queue_full(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return negotiated_response(http_request, {
+        "start": request.start.isoformat(), "end": request.end.isoformat(), "events": events
+    })
+
+@app.get("/ephemeris/range", dependencies=[Depends(require_ready)])
+async def ephemeris_range(http_request: Request, start: datetime, end: datetime, step_minutes: float = 60.0,
+                          bodies: Optional[str] = None):
+    """Geocentric positions from ``start`` to ``end`` every ``step_minutes``, streamed as NDJSON.
+
+    ``bodies`` is a comma-separated list; every body by default. Clients that
+    accept MessagePack get a stream of concatenated MessagePack rows instead.
+    """
+    try:
+        grid = EphemerisRange(start, end, step_minutes, bodies.split(",") if bodies else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    binary = wants_msgpack(http_request.headers.get("accept"))
+    return StreamingResponse(
+        encode_stream(grid.chunks(), binary),
+        media_type=MSGPACK_MEDIA_TYPE if binary else "application/x-ndjson"
+    )
@@ -0,0 +1,39 @@
+import os
+import resource
+import sys
+from typing import Dict, Optional
+
+# /proc/<pid>/status fields, in kB
+STATUS_FIELDS = {'VmRSS': 'rss_mb', 'RssAnon': 'anonymous_mb', 'RssFile': 'file_mb', 'RssShmem': 'shared_memory_mb'}
+
+def _read_kb(path: str, fields: Dict[str, str]) -> Dict[str, float]:
+    values = {}
+    with open(path) as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in fields:
+                values[fields[name]] = int(rest.split()[0]) / 1024.0
+    return values
+
+def process_memory(pid: Optional[int] = None) -> Dict:
+    """Resident memory of a process in MB.
+
+    On Linux this includes the file-backed part (memory-mapped kernel and
+    table pages) and PSS, which divides shared pages between the processes
+    mapping them. Summing PSS across workers gives their real footprint.
+    Elsewhere only this process's peak RSS is available.
+    """
+    pid = pid or os.getpid()
+    report: Dict = {'pid': pid}
+    try:
+        report.update(_read_kb(f'/proc/{pid}/status', STATUS_FIELDS))
+    except OSError:
+        if pid == os.getpid():
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report['peak_rss_mb'] = peak / (1024.0 * 1024.0) if sys.platform == 'darwin' else peak / 1024.0
+        return report
+    try:
+        report.update(_read_kb(f'/proc/{pid}/smaps_rollup', {'Pss': 'pss_mb'}))
+    except OSError:
+        pass
+    return report
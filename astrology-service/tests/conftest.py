@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The service imports its modules by flat name (``from calculations import ...``)
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SERVICE_DIR not in sys.path:
+    sys.path.insert(0, SERVICE_DIR)
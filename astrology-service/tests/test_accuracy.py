@@ -0,0 +1,69 @@
+"""Spot checks against the Swiss Ephemeris.
+
+Swiss Ephemeris longitudes are apparent (aberration and light deflection
+applied) while ours are astrometric, so event times are compared with
+those corrections switched off. Without ephemeris files it falls back to
+the Moshier theory, good to about an arcsecond here.
+"""
+from datetime import datetime, timezone
+import pytest
+import swisseph as swe
+import config
+from ephemeris import get_ephemeris
+from events import find_events
+from houses import compute_houses
+from zodiac import SIGNS, ayanamsa
+
+CUSP_TOLERANCE_ARCSEC = 15.0
+# Lahiri precession models differ by up to about 20 arcseconds over the century
+AYANAMSA_TOLERANCE_ARCSEC = 30.0
+EVENT_TOLERANCE_SECONDS = 5.0
+
+CHARTS = [
+    (datetime(1990, 5, 17, 18, 30, tzinfo=timezone.utc), 40.7128, -74.0060),
+    (datetime(2005, 12, 1, 3, 0, tzinfo=timezone.utc), -33.8688, 151.2093),
+    (datetime(2020, 6, 21, 12, 0, tzinfo=timezone.utc), 64.1466, -21.9426)
+]
+
+def _julian_day_ut(moment: datetime) -> float:
+    return swe.julday(moment.year, moment.month, moment.day, moment.hour + moment.minute / 60.0)
+
+def _arcsec(a: float, b: float) -> float:
+    return abs((a - b + 180.0) % 360.0 - 180.0) * 3600.0
+
+@pytest.mark.parametrize('system,code', [('placidus', b'P'), ('porphyry', b'O')])
+@pytest.mark.parametrize('moment,latitude,longitude', CHARTS)
+def test_cusps_match_swiss_ephemeris(system, code, moment, latitude, longitude):
+    houses = compute_houses(get_ephemeris().ts.from_datetime(moment), latitude, longitude, system)
+    cusps, (ascendant, mc, *_) = swe.houses_ex(_julian_day_ut(moment), latitude, longitude, code)
+
+    assert _arcsec(float(houses['ascendant']), ascendant) < CUSP_TOLERANCE_ARCSEC
+    assert _arcsec(float(houses['mc']), mc) < CUSP_TOLERANCE_ARCSEC
+    for house in range(12):
+        assert _arcsec(float(houses['cusps'][house]), cusps[house]) < CUSP_TOLERANCE_ARCSEC
+
+@pytest.mark.parametrize('year', [1900, 1950, 2000, 2025, 2050])
+def test_lahiri_ayanamsa_matches_swiss_ephemeris(year):
+    moment = datetime(year, 1, 1, tzinfo=timezone.utc)
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+    expected = swe.get_ayanamsa_ut(_julian_day_ut(moment))
+
+    actual = float(ayanamsa(get_ephemeris().ts.from_datetime(moment), 'lahiri', cache=False))
+
+    assert _arcsec(actual, expected) < AYANAMSA_TOLERANCE_ARCSEC
+
+def test_ingress_times_match_swiss_ephemeris(monkeypatch):
+    monkeypatch.setattr(config, 'ZODIAC', 'tropical')
+    events = find_events(
+        datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 4, 1, tzinfo=timezone.utc),
+        types=['ingress'], bodies=['sun', 'moon']
+    )
+    assert {event['body'] for event in events} == {'sun', 'moon'}
+
+    flags = swe.FLG_SWIEPH | swe.FLG_NOABERR | swe.FLG_NOGDEFL
+    for event in events:
+        crossing = SIGNS.index(event['sign']) * 30.0
+        jd_ut = get_ephemeris().ts.tt_jd(event['tt']).ut1
+        cross = swe.solcross_ut if event['body'] == 'sun' else swe.mooncross_ut
+        expected = cross(crossing, jd_ut - 2.0, flags)
+        assert abs(jd_ut - expected) * 86400.0 < EVENT_TOLERANCE_SECONDS, event
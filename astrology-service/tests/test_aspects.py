@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from aspects import AspectTable, classify, natal_aspects_batch, separations, transit_aspects_batch
+
+def _aspect(separation, orbs=None, include_minor=True):
+    table = AspectTable(orbs, include_minor)
+    index, orb = classify(np.array([separation]), table)
+    return (table.names[index[0]], float(orb[0])) if index[0] >= 0 else None
+
+@pytest.mark.parametrize('separation,expected', [
+    (0.0, ('conjunction', 0.0)),
+    (7.5, ('conjunction', 7.5)),
+    (8.5, None),
+    (93.0, ('square', 3.0)),
+    (128.0, ('trine', 8.0)),
+    (146.0, ('biquintile', 2.0)),
+    (147.0, ('quincunx', 3.0)),
+    (176.0, ('opposition', 4.0))
+])
+def test_classify_known_separations(separation, expected):
+    assert _aspect(separation) == (expected and pytest.approx(expected))
+
+def test_classify_picks_the_tightest_aspect_within_orb():
+    # 128 degrees is 8 from a trine and, with a wider orb, 7 from a sesquiquadrate
+    assert _aspect(128.0, orbs={'sesquiquadrate': 10.0}) == ('sesquiquadrate', pytest.approx(7.0))
+
+def test_orb_overrides_narrow_and_widen():
+    assert _aspect(5.0, orbs={'conjunction': 4.0}) is None
+    assert _aspect(100.0, orbs={'square': 10.0}) == ('square', pytest.approx(10.0))
+    with pytest.raises(ValueError, match='Unknown aspects: septile'):
+        AspectTable({'septile': 1.0})
+
+def test_minor_aspects_can_be_left_out():
+    assert _aspect(146.0, include_minor=False) is None
+
+def test_separations_wrap_across_zero():
+    assert separations(np.array([359.0]), np.array([1.0, 179.0, 181.0]))[0] == pytest.approx([2.0, 180.0, 178.0])
+
+def test_natal_aspects_list_each_pair_once_without_self_pairs():
+    names = ['sun', 'moon', 'mars']
+    longitudes = np.array([[359.0, 1.0, 3.0], [10.0, 130.0, 250.0]])
+
+    charts = natal_aspects_batch(longitudes, names)
+
+    assert [(r['planet1'], r['planet2'], r['aspect'], r['angle']) for r in charts[0]] == [
+        ('sun', 'moon', 'conjunction', pytest.approx(2.0)),
+        ('sun', 'mars', 'conjunction', pytest.approx(4.0)),
+        ('moon', 'mars', 'conjunction', pytest.approx(2.0))
+    ]
+    assert [(r['planet1'], r['planet2'], r['aspect']) for r in charts[1]] == [
+        ('sun', 'moon', 'trine'), ('sun', 'mars', 'trine'), ('moon', 'mars', 'trine')
+    ]
+    assert all(r['major'] for chart in charts for r in chart)
+
+def test_transit_aspects_share_one_sky_across_charts():
+    natal = np.array([[0.5, 90.0], [178.0, 300.0]])
+
+    charts = transit_aspects_batch(np.array([358.0, 60.0]), ['sun', 'mars'], natal, ['sun', 'moon'])
+
+    assert [(r['planet1'], r['planet2'], r['aspect'], r['orb']) for r in charts[0]] == [
+        ('sun', 'sun', 'conjunction', pytest.approx(2.5)),
+        ('sun', 'moon', 'square', pytest.approx(2.0)),
+        ('mars', 'sun', 'sextile', pytest.approx(0.5)),
+        ('mars', 'moon', 'semisextile', pytest.approx(0.0))
+    ]
+    assert [(r['planet1'], r['planet2'], r['aspect']) for r in charts[1]] == [
+        ('sun', 'sun', 'opposition'), ('sun', 'moon', 'sextile'), ('mars', 'sun', 'trine'), ('mars', 'moon', 'trine')
+    ]
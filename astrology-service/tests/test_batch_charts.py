@@ -0,0 +1,55 @@
+import math
+import pytest
+from fastapi.testclient import TestClient
+from calculations import calculate_birth_chart, calculate_birth_charts
+from main import app
+
+VALID = {
+    'birth_date': '1990-05-15',
+    'birth_time': '14:30',
+    'latitude': 19.076,
+    'longitude': 72.8777,
+    'timezone': 'Asia/Kolkata'
+}
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+def test_batch_mixes_valid_and_invalid_records():
+    records = [
+        VALID,
+        {**VALID, 'birth_date': '1700-01-01'},
+        {**VALID, 'latitude': math.nan},
+        {**VALID, 'longitude': 200.0},
+        {**VALID, 'timezone': 'Nowhere/Special'},
+        {**VALID, 'birth_date': '2005-02-03'}
+    ]
+    results = calculate_birth_charts(records)
+
+    assert 'outside the ephemeris range' in results[1]['error']
+    assert 'latitude' in results[2]['error']
+    assert 'longitude' in results[3]['error']
+    assert 'timezone' in results[4]['error']
+    for index in (0, 5):
+        single = calculate_birth_chart(**records[index])
+        chart = results[index]['chart']
+        assert chart['sun_sign'] == single['sun_sign']
+        assert chart['planet_positions']['moon']['longitude'] == pytest.approx(
+            single['planet_positions']['moon']['longitude'], abs=1e-9)
+
+def test_batch_with_only_invalid_records():
+    results = calculate_birth_charts([{**VALID, 'birth_date': '2300-01-01'}, {**VALID, 'latitude': 91.0}])
+    assert [set(result) for result in results] == [{'error'}, {'error'}]
+
+def test_single_chart_outside_range_is_a_value_error():
+    with pytest.raises(ValueError):
+        calculate_birth_chart(**{**VALID, 'birth_date': '1700-01-01'})
+
+def test_batch_endpoint_reports_errors_per_record(client):
+    response = client.post("/calculate-charts", json={"records": [VALID, {**VALID, 'birth_date': '1700-01-01'}]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["index"] == 0 and results[0]["chart"]["sun_sign"]
+    assert results[1]["index"] == 1 and "outside the ephemeris range" in results[1]["error"]
@@ -0,0 +1,51 @@
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+from encoding import MSGPACK_MEDIA_TYPE, encode_stream, wants_msgpack
+from main import app
+
+@pytest.mark.parametrize('accept,expected', [
+    (None, False),
+    ('', False),
+    ('*/*', False),
+    ('application/json', False),
+    ('application/x-msgpack', True),
+    ('application/msgpack', True),
+    ('application/x-msgpack, application/json;q=0.9', True),
+    ('application/json, application/x-msgpack;q=0.9', False),
+    # A tie goes to MessagePack
+    ('application/x-msgpack, */*', True),
+    ('application/vnd.msgpack;q=0.5, */*;q=0.1', True),
+    ('application/x-msgpack;q=0', False),
+    ('application/x-msgpack;q=0, */*', False),
+    ('application/x-msgpack;q=bogus, application/json', False),
+    ('APPLICATION/X-MSGPACK', True)
+])
+def test_accept_header_ranking(accept, expected):
+    assert wants_msgpack(accept) is expected
+
+def test_stream_encodings_hold_the_same_rows():
+    chunks = [[[1.0, 'a'], [2.0, 'b']], [[3.0, 'c']]]
+
+    ndjson = b''.join(encode_stream(chunks, binary=False))
+    packed = b''.join(encode_stream(chunks, binary=True))
+
+    assert ndjson == b'[1.0,"a"]\n[2.0,"b"]\n[3.0,"c"]\n'
+    unpacker = msgpack.Unpacker(raw=False)
+    unpacker.feed(packed)
+    assert list(unpacker) == [row for chunk in chunks for row in chunk]
+
+def test_chart_is_returned_as_msgpack_when_asked_for():
+    birth_data = {
+        'birth_date': '1990-05-15', 'birth_time': '14:30', 'latitude': 19.076, 'longitude': 72.8777,
+        'timezone': 'Asia/Kolkata'
+    }
+    with TestClient(app) as client:
+        as_json = client.post('/calculate-chart', json=birth_data)
+        as_msgpack = client.post('/calculate-chart', json=birth_data, headers={
+            'Accept': f'{MSGPACK_MEDIA_TYPE}, application/json;q=0.9'
+        })
+
+    assert as_json.headers['content-type'].startswith('application/json')
+    assert as_msgpack.headers['content-type'].startswith(MSGPACK_MEDIA_TYPE)
+    assert msgpack.unpackb(as_msgpack.content, raw=False) == as_json.json()
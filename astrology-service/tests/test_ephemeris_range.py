@@ -0,0 +1,29 @@
+from datetime import datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+from ephemeris_range import EphemerisRange
+from main import app
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+def test_range_outside_coverage_is_rejected_on_construction():
+    with pytest.raises(ValueError, match="outside the ephemeris range"):
+        EphemerisRange(datetime(1700, 1, 1, tzinfo=timezone.utc), datetime(1700, 1, 2, tzinfo=timezone.utc), 60.0)
+
+def test_range_route_rejects_uncovered_dates_before_streaming(client):
+    response = client.get("/ephemeris/range", params={
+        "start": "2024-01-01T00:00:00Z", "end": "2600-01-01T00:00:00Z", "step_minutes": 60 * 24 * 365
+    })
+    assert response.status_code == 400
+    assert "outside the ephemeris range" in response.json()["detail"]
+
+def test_range_route_streams_covered_dates(client):
+    response = client.get("/ephemeris/range", params={
+        "start": "2024-01-01T00:00:00Z", "end": "2024-01-01T03:00:00Z", "bodies": "sun,moon"
+    })
+    assert response.status_code == 200
+    rows = response.text.strip().splitlines()
+    assert len(rows) == 4
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+from events import find_events
+from main import app
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+def test_search_outside_coverage_is_rejected_before_sampling():
+    with pytest.raises(ValueError, match="outside the ephemeris range"):
+        find_events(datetime(2049, 12, 1, tzinfo=timezone.utc), datetime(2050, 6, 1, tzinfo=timezone.utc))
+
+def test_events_route_rejects_uncovered_dates(client):
+    response = client.post("/events", json={"start": "1899-06-01T00:00:00Z", "end": "1900-03-01T00:00:00Z"})
+    assert response.status_code == 400
+    assert "outside the ephemeris range" in response.json()["detail"]
+
+def test_events_route_finds_ingresses_in_covered_dates(client):
+    response = client.post("/events", json={
+        "start": "2024-01-01T00:00:00Z", "end": "2024-02-01T00:00:00Z", "types": ["ingress"], "bodies": ["sun"]
+    })
+    assert response.status_code == 200
+    # One Sun ingress a month, whichever zodiac is configured
+    assert [event["body"] for event in response.json()["events"]] == ["sun"]
@@ -0,0 +1,60 @@
+import asyncio
+import time
+import httpx
+import pytest
+import pytest_asyncio
+from calculations import calculate_birth_chart
+from ephemeris import get_ephemeris
+from executor import ChartExecutor
+import main
+
+VALID = {
+    'birth_date': '1990-05-15',
+    'birth_time': '14:30',
+    'latitude': 19.076,
+    'longitude': 72.8777,
+    'timezone': 'Asia/Kolkata'
+}
+
+@pytest_asyncio.fixture
+async def process_executor(monkeypatch):
+    """A one-worker pool that queues a single calculation, in place of the service's executor."""
+    get_ephemeris()
+    executor = ChartExecutor(mode='process', workers=1, queue_size=1, retry_after=7)
+    await executor.start()
+    monkeypatch.setattr(main, 'chart_executor', executor)
+    yield executor
+    executor.shutdown()
+
+def service_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://astrology.test")
+
+@pytest.mark.asyncio
+async def test_full_queue_answers_429_with_retry_after(process_executor):
+    busy = asyncio.ensure_future(process_executor.run(time.sleep, 0.5))
+    await asyncio.sleep(0)
+    assert process_executor.in_flight == process_executor.queue_size
+
+    async with service_client() as client:
+        response = await client.post("/calculate-chart", json=VALID)
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert process_executor.stats()['rejected'] == 1
+    await busy
+
+@pytest.mark.asyncio
+async def test_charts_are_calculated_in_the_worker_process(process_executor):
+    async with service_client() as client:
+        response = await client.post("/calculate-chart", json=VALID)
+        ready = await client.get("/ready")
+
+    assert response.status_code == 200
+    chart = response.json()
+    inline = calculate_birth_chart(**VALID)
+    assert chart['sun_sign'] == inline['sun_sign']
+    assert chart['planet_positions']['moon']['longitude'] == pytest.approx(
+        inline['planet_positions']['moon']['longitude'], abs=1e-9)
+    assert ready.json()['executor']['mode'] == 'process'
+    assert len(process_executor.worker_pids()) == 1
+    assert process_executor.in_flight == 0
@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+from calculations import calculate_birth_chart
+from transits import SkySnapshotCache, calculate_transits
+from main import app
+import config
+import transits
+
+# Midnight UTC starts a transit slot, so the snapshot is taken at the birth instant
+BIRTH = ('2001-03-21', '00:00', 51.4779, -0.0015, 'UTC')
+MOMENT = datetime(2001, 3, 21, tzinfo=timezone.utc)
+
+@pytest.fixture(autouse=True)
+def fresh_snapshots(monkeypatch):
+    # Snapshots are computed in the zodiac configured at the time
+    monkeypatch.setattr(transits, 'sky_snapshots', SkySnapshotCache())
+
+@pytest.fixture(params=['sidereal', 'tropical'])
+def zodiac(request, monkeypatch):
+    monkeypatch.setattr(config, 'ZODIAC', request.param)
+    return request.param
+
+def _natal_separation(planet_positions, body):
+    result = calculate_transits(planet_positions, MOMENT)
+    return abs(result['separations'][body][body])
+
+@pytest.mark.parametrize('body', ['sun', 'mars', 'saturn'])
+def test_transits_use_the_chart_zodiac(zodiac, body):
+    chart = calculate_birth_chart(*BIRTH)
+    natal = chart['planet_positions'][body]
+    field = 'sidereal_longitude' if zodiac == 'sidereal' else 'longitude'
+    result = calculate_transits(chart['planet_positions'], MOMENT)
+
+    assert result['natal_longitudes'][body] == natal[field]
+    # Charts are topocentric and the snapshot geocentric; parallax is arcseconds for these bodies
+    assert result['transits'][body]['longitude'] == pytest.approx(natal[field], abs=0.01)
+    assert _natal_separation(chart['planet_positions'], body) < 0.01
+
+def test_radec_only_positions_fall_back_to_the_j2000_ecliptic(monkeypatch):
+    monkeypatch.setattr(config, 'ZODIAC', 'sidereal')
+    chart = calculate_birth_chart(*BIRTH)
+    radec_only = {
+        name: {'ra': position['ra'], 'dec': position['dec']}
+        for name, position in chart['planet_positions'].items()
+    }
+    assert _natal_separation(radec_only, 'sun') < 0.01
+
+def test_snapshot_outside_coverage_is_rejected():
+    with pytest.raises(ValueError, match="outside the ephemeris range"):
+        transits.sky_snapshots.get(datetime(2100, 1, 1, tzinfo=timezone.utc))
+
+def test_transits_route_rejects_an_uncovered_instant():
+    with TestClient(app) as client:
+        response = client.post("/chart/c1/transits", json={
+            "planet_positions": {"sun": {"ra": 3.6, "dec": 19.2}}, "at": "2100-01-01T12:00:00Z"
+        })
+    assert response.status_code == 400
+    assert "outside the ephemeris range" in response.json()["detail"]
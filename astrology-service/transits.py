@@ -0,0 +1,124 @@
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import numpy as np
+from calculations import geocentric_planet_vectors, positions_to_radec
+from coordinates import positions_to_longitudes
+from aspects import separations, transit_aspects_batch
+from ephemeris import get_ephemeris
+from zodiac import AYANAMSAS, zodiac_longitude
+import config
+
+logger = logging.getLogger(__name__)
+
+class SkySnapshot:
+    """Geocentric positions of every transiting body at the start of one time slot."""
+
+    def __init__(self, slot_start: datetime, names: List[str], longitudes: np.ndarray,
+                 speeds: np.ndarray, ra: np.ndarray, dec: np.ndarray, distance: np.ndarray):
+        self.slot_start = slot_start
+        self.names = names
+        self.longitudes = longitudes
+        self.speeds = speeds
+        self.positions = {
+            name: {
+                'ra': float(ra[i]),
+                'dec': float(dec[i]),
+                'distance': float(distance[i]),
+                'longitude': float(longitudes[i]),
+                'speed': float(speeds[i]),
+                'retrograde': bool(speeds[i] < 0)
+            }
+            for i, name in enumerate(names)
+        }
+
+def slot_start(moment: datetime, slot_minutes: int = config.TRANSIT_SLOT_MINUTES) -> datetime:
+    """Start of the UTC time slot containing ``moment``."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    moment = moment.astimezone(timezone.utc)
+    midnight = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    elapsed = int((moment - midnight).total_seconds() // 60)
+    return midnight + timedelta(minutes=elapsed - elapsed % slot_minutes)
+
+def compute_snapshot(start: datetime) -> SkySnapshot:
+    """Evaluate the sky at ``start``, and one hour later to get each body's daily motion.
+
+    Raises ValueError when that hour is outside the kernel's coverage.
+    """
+    ephemeris = get_ephemeris()
+    t = ephemeris.ts.from_datetimes([start, start + timedelta(hours=1)])
+    ephemeris.require_coverage(t)
+    xyz = geocentric_planet_vectors(ephemeris, t)
+    # The configured zodiac, so transits compare with the longitudes stored with each chart
+    longitudes = zodiac_longitude(xyz, t)
+    # Wrap the hourly difference into (-180, 180] before scaling to degrees per day
+    speeds = ((longitudes[:, 1] - longitudes[:, 0] + 180.0) % 360.0 - 180.0) * 24.0
+    ra, dec, distance = positions_to_radec(xyz[..., 0])
+    return SkySnapshot(start, list(ephemeris.planets), longitudes[:, 0], speeds, ra, dec, distance)
+
+class SkySnapshotCache:
+    """Keeps the most recent sky snapshots so every chart in a slot shares one computation."""
+
+    def __init__(self, slot_minutes: int = config.TRANSIT_SLOT_MINUTES,
+                 max_size: int = config.TRANSIT_SNAPSHOT_CACHE_SIZE):
+        self.slot_minutes = slot_minutes
+        self.max_size = max_size
+        self._snapshots: "OrderedDict[datetime, SkySnapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, moment: Optional[datetime] = None) -> SkySnapshot:
+        """Snapshot for the slot containing ``moment`` (now by default), computed at most once."""
+        start = slot_start(moment or datetime.now(timezone.utc), self.slot_minutes)
+        with self._lock:
+            snapshot = self._snapshots.get(start)
+            if snapshot is None:
+                logger.info(f"Computing sky snapshot for slot {start.isoformat()}")
+                snapshot = compute_snapshot(start)
+                self._snapshots[start] = snapshot
+                while len(self._snapshots) > self.max_size:
+                    self._snapshots.popitem(last=False)
+            else:
+                self._snapshots.move_to_end(start)
+            return snapshot
+
+sky_snapshots = SkySnapshotCache()
+
+def stored_longitudes(planet_positions: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Natal longitudes in the configured zodiac, as the chart endpoints returned them.
+
+    Positions without the zodiac longitude (charts stored before it was
+    returned) fall back to their RA and declination on the J2000 ecliptic,
+    less the mean J2000 ayanamsa in the sidereal zodiac. Precession cancels
+    there, leaving nutation-sized errors; tropical fallbacks are off by the
+    precession since J2000.
+    """
+    field = 'sidereal_longitude' if config.ZODIAC == 'sidereal' else 'longitude'
+    stored = {name: position.get(field) for name, position in planet_positions.items()}
+    missing = {name: planet_positions[name] for name, longitude in stored.items() if longitude is None}
+    if missing:
+        offset = AYANAMSAS[config.AYANAMSA] if config.ZODIAC == 'sidereal' else 0.0
+        for name, longitude in positions_to_longitudes(missing).items():
+            stored[name] = (longitude - offset) % 360.0
+    return stored
+
+def calculate_transits(planet_positions: Dict[str, Dict[str, float]], moment: Optional[datetime] = None) -> Dict:
+    """Compare the shared sky snapshot with one natal chart's planet positions."""
+    snapshot = sky_snapshots.get(moment)
+    natal = stored_longitudes(planet_positions)
+    natal_names = list(natal)
+    natal_longitudes = np.array([natal[name] for name in natal_names])
+    separation = separations(snapshot.longitudes, natal_longitudes)
+    aspects = transit_aspects_batch(snapshot.longitudes, snapshot.names, natal_longitudes[np.newaxis], natal_names)[0]
+    return {
+        'slot_start': snapshot.slot_start.isoformat(),
+        'transits': snapshot.positions,
+        'natal_longitudes': natal,
+        'separations': {
+            transit: dict(zip(natal_names, separation[i].tolist()))
+            for i, transit in enumerate(snapshot.names)
+        },
+        'aspects': aspects
+    }
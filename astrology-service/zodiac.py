@@ -0,0 +1,142 @@
+from typing import Dict, List, Tuple
+import numpy as np
+from skyfield.framelib import ICRS_to_J2000
+from skyfield.functions import mxm, mxmxm, rot_x
+from skyfield.nutationlib import build_nutation_matrix, iau2000b_radians, mean_obliquity
+from houses import sidereal_times
+import config
+
+SIGNS = [
+    'Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo',
+    'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces'
+]
+
+NAKSHATRAS = [
+    'Ashwini', 'Bharani', 'Krittika', 'Rohini', 'Mrigashira', 'Ardra', 'Punarvasu',
+    'Pushya', 'Ashlesha', 'Magha', 'Purva Phalguni', 'Uttara Phalguni', 'Hasta',
+    'Chitra', 'Swati', 'Vishakha', 'Anuradha', 'Jyeshtha', 'Mula', 'Purva Ashadha',
+    'Uttara Ashadha', 'Shravana', 'Dhanishta', 'Shatabhisha', 'Purva Bhadrapada',
+    'Uttara Bhadrapada', 'Revati'
+]
+
+NAKSHATRA_SPAN = 360.0 / 27
+PADA_SPAN = NAKSHATRA_SPAN / 4
+
+# Mean ayanamsa at J2000.0 in degrees; it then grows with general precession
+AYANAMSAS = {
+    'lahiri': 23.8570923,
+    'fagan_bradley': 24.7402999,
+    'raman': 22.4107910,
+    'krishnamurti': 23.7602400
+}
+
+def nutation(t, cache: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Mean obliquity, true obliquity and nutation in longitude (degrees) at ``t``.
+
+    IAU 2000B nutation is good to a milliarcsecond at a fraction of the cost of 2000A.
+
+    With ``cache`` the nutation comes from the sidereal time cache the house
+    calculation shares; pass ``cache=False`` for one-off time grids so they
+    don't evict chart timestamps from it.
+    """
+    mean = mean_obliquity(t.tdb) / 3600.0
+    if cache:
+        _, true, dpsi = sidereal_times.get(t)
+    else:
+        dpsi, deps = iau2000b_radians(t)
+        true, dpsi = mean + np.degrees(deps), np.degrees(dpsi)
+    return mean, true, dpsi
+
+def _ecliptic(xyz: np.ndarray, t, mean: np.ndarray, true: np.ndarray, dpsi: np.ndarray):
+    # ICRS -> mean J2000 (frame bias) -> mean equator of date -> true equator -> true ecliptic of date
+    equator = mxmxm(
+        build_nutation_matrix(np.radians(mean), np.radians(true), np.radians(dpsi)),
+        t.precession_matrix(),
+        ICRS_to_J2000
+    )
+    rotation = mxm(rot_x(-np.radians(true)), equator)
+    x, y, z = np.einsum('ij...,bj...->ib...', rotation, xyz)
+    longitude = np.degrees(np.arctan2(y, x)) % 360.0
+    latitude = np.degrees(np.arctan2(z, np.hypot(x, y)))
+    return longitude, latitude
+
+def ecliptic_of_date(xyz: np.ndarray, t, cache: bool = True):
+    """Tropical longitude and latitude (degrees, true ecliptic and equinox of date).
+
+    ``xyz`` is an ICRS stack of shape ``(n_bodies, 3, *t.shape)``.
+    """
+    return _ecliptic(xyz, t, *nutation(t, cache))
+
+def _ayanamsa(t, name: str, dpsi: np.ndarray) -> np.ndarray:
+    if name not in AYANAMSAS:
+        raise ValueError(f"Unknown ayanamsa: {name}")
+    centuries = (t.tt - 2451545.0) / 36525.0
+    precession = (5028.796195 * centuries + 1.1054348 * centuries ** 2) / 3600.0
+    return AYANAMSAS[name] + precession + dpsi
+
+def ayanamsa(t, name: str = config.AYANAMSA, cache: bool = True) -> np.ndarray:
+    """True ayanamsa (degrees) at ``t``: the mean value plus nutation in longitude."""
+    return _ayanamsa(t, name, nutation(t, cache)[2])
+
+def zodiac_longitude(xyz: np.ndarray, t) -> np.ndarray:
+    """Longitude (degrees) in the configured zodiac, without touching the sidereal time cache.
+
+    Meant for time grids rather than chart timestamps; the nutation series is
+    evaluated once for both the ecliptic and the ayanamsa.
+    """
+    mean, true, dpsi = nutation(t, cache=False)
+    longitude, _ = _ecliptic(xyz, t, mean, true, dpsi)
+    if config.ZODIAC == 'sidereal':
+        longitude = (longitude - _ayanamsa(t, config.AYANAMSA, dpsi)) % 360.0
+    return longitude
+
+def derive(tropical: np.ndarray, ayanamsa_degrees: np.ndarray) -> Dict[str, np.ndarray]:
+    """Sign, degree and nakshatra/pada for any array of tropical longitudes.
+
+    ``ayanamsa_degrees`` broadcasts against ``tropical``, so one value per
+    chart covers every body of that chart.
+    """
+    sidereal = (tropical - ayanamsa_degrees) % 360.0
+    return {
+        'longitude': tropical,
+        'sign': (tropical // 30.0).astype(int) % 12,
+        'sign_degree': tropical % 30.0,
+        'sidereal_longitude': sidereal,
+        'sidereal_sign': (sidereal // 30.0).astype(int) % 12,
+        'sidereal_sign_degree': sidereal % 30.0,
+        'nakshatra': (sidereal // NAKSHATRA_SPAN).astype(int) % 27,
+        'pada': ((sidereal % NAKSHATRA_SPAN) // PADA_SPAN).astype(int) + 1
+    }
+
+def point_to_dict(derived: Dict[str, np.ndarray], index) -> Dict:
+    """JSON-ready derived values for one point; ``index`` selects it in the arrays."""
+    return {
+        'longitude': float(derived['longitude'][index]),
+        'sign': SIGNS[derived['sign'][index]],
+        'sign_degree': float(derived['sign_degree'][index]),
+        'sidereal_longitude': float(derived['sidereal_longitude'][index]),
+        'sidereal_sign': SIGNS[derived['sidereal_sign'][index]],
+        'sidereal_sign_degree': float(derived['sidereal_sign_degree'][index]),
+        'nakshatra': NAKSHATRAS[derived['nakshatra'][index]],
+        'pada': int(derived['pada'][index])
+    }
+
+def chart_zodiac(derived_bodies: Dict[str, np.ndarray], derived_angles: Dict[str, np.ndarray],
+                 names: List[str], ayanamsa_degrees: float, index=()) -> Dict:
+    """Zodiac summary for one chart, with the gateway's ChartData sign fields.
+
+    ``derived_bodies`` holds ``(n_bodies, ...)`` arrays and ``derived_angles``
+    ``(2, ...)`` arrays for the ascendant and MC.
+    """
+    sign_key = 'sidereal_sign' if config.ZODIAC == 'sidereal' else 'sign'
+    return {
+        'zodiac': config.ZODIAC,
+        'ayanamsa': {'name': config.AYANAMSA, 'degrees': float(ayanamsa_degrees)},
+        'ascendant': SIGNS[derived_angles[sign_key][(0,) + index]],
+        'sun_sign': SIGNS[derived_bodies[sign_key][(names.index('sun'),) + index]],
+        'moon_sign': SIGNS[derived_bodies[sign_key][(names.index('moon'),) + index]],
+        'angles': {
+            'ascendant': point_to_dict(derived_angles, (0,) + index),
+            'mc': point_to_dict(derived_angles, (1,) + index)
+        }
+    }
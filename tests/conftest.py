@@ -1,2 +1,16 @@
 import os
-os.environ["TESTING"] = "True"
\ No newline at end of file
+os.environ["TESTING"] = "True"
+# The cheapest bcrypt cost, so signup and login tests stay fast
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+
+import mongomock
+import pytest
+from mongoengine import connect, disconnect
+
+@pytest.fixture
+def mongo():
+    """An in-memory MongoDB behind the default mongoengine connection."""
+    disconnect()
+    connect("test", host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    yield
+    disconnect()
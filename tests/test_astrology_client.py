@@ -0,0 +1,295 @@
+import asyncio
+import json
+import httpx
+import msgpack
+import pytest
+from app.services import astrology_client
+from app.services.astrology_client import (
+    AstrologyServiceBusyError, AstrologyServiceClientError, AstrologyServiceConnectionError,
+    AstrologyServiceServerError, CircuitBreaker, MicroBatcher, SingleFlight, get_daily_transits
+)
+
+POSITIONS = {"sun": {"ra": 3.6, "dec": 19.2}}
+TRANSITS = {"chart_id": "c1", "transits": {}, "aspects": []}
+RESET_SECONDS = 0.05
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the shared client through ``upstream.handler``, with a fresh breaker, metrics and coalescer."""
+    class Upstream:
+        calls = []
+        handler = None
+
+    async def dispatch(request: httpx.Request) -> httpx.Response:
+        Upstream.calls.append(request)
+        return await Upstream.handler(request)
+
+    client = httpx.AsyncClient(base_url="http://astrology.test", transport=httpx.MockTransport(dispatch))
+    monkeypatch.setattr(astrology_client, "_client", client)
+    monkeypatch.setattr(astrology_client, "breaker", CircuitBreaker(failure_threshold=2, reset_seconds=RESET_SECONDS))
+    monkeypatch.setattr(astrology_client, "request_metrics", {'budget_exceeded': 0, 'hedged': 0, 'hedge_wins': 0})
+    monkeypatch.setattr(astrology_client, "single_flight", SingleFlight())
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_HEDGE_ENABLED", False)
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_LATENCY_BUDGET_SECONDS", 1.0)
+    Upstream.calls = []
+    return Upstream
+
+def respond(status_code, content=None, delay=0.0):
+    async def handler(request):
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(status_code, json=content if content is not None else {"detail": "error"})
+    return handler
+
+async def open_breaker(upstream):
+    upstream.handler = respond(500)
+    for _ in range(2):
+        with pytest.raises(AstrologyServiceServerError):
+            await get_daily_transits("c1", POSITIONS)
+    assert astrology_client.breaker.state == CircuitBreaker.OPEN
+
+@pytest.mark.asyncio
+async def test_breaker_opens_after_consecutive_failures_and_fails_fast(upstream):
+    await open_breaker(upstream)
+
+    with pytest.raises(AstrologyServiceConnectionError, match="circuit breaker is open"):
+        await get_daily_transits("c1", POSITIONS)
+
+    assert len(upstream.calls) == 2
+    assert astrology_client.breaker.stats()['rejected'] == 1
+    assert astrology_client.breaker.transitions == {"closed->open": 1}
+
+@pytest.mark.asyncio
+async def test_successful_probe_closes_the_breaker(upstream):
+    await open_breaker(upstream)
+    await asyncio.sleep(RESET_SECONDS)
+    upstream.handler = respond(200, TRANSITS)
+
+    assert await get_daily_transits("c1", POSITIONS) == TRANSITS
+
+    breaker = astrology_client.breaker
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.consecutive_failures == 0
+    assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_the_breaker(upstream):
+    await open_breaker(upstream)
+    await asyncio.sleep(RESET_SECONDS)
+
+    with pytest.raises(AstrologyServiceServerError):
+        await get_daily_transits("c1", POSITIONS)
+
+    breaker = astrology_client.breaker
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.transitions == {"closed->open": 1, "open->half_open": 1, "half_open->open": 1}
+    with pytest.raises(AstrologyServiceConnectionError):
+        await get_daily_transits("c1", POSITIONS)
+    assert len(upstream.calls) == 3
+
+@pytest.mark.asyncio
+async def test_half_open_breaker_lets_one_probe_through(upstream):
+    await open_breaker(upstream)
+    await asyncio.sleep(RESET_SECONDS)
+    upstream.handler = respond(200, TRANSITS, delay=0.02)
+
+    results = await asyncio.gather(
+        get_daily_transits("c1", POSITIONS),
+        get_daily_transits("c2", POSITIONS),
+        return_exceptions=True
+    )
+
+    assert results[0] == TRANSITS
+    assert isinstance(results[1], AstrologyServiceConnectionError)
+    assert astrology_client.breaker.state == CircuitBreaker.CLOSED
+
+@pytest.mark.asyncio
+async def test_client_errors_keep_the_breaker_closed(upstream):
+    upstream.handler = respond(422)
+
+    for _ in range(5):
+        with pytest.raises(AstrologyServiceClientError):
+            await get_daily_transits("c1", POSITIONS)
+
+    assert astrology_client.breaker.state == CircuitBreaker.CLOSED
+    assert len(upstream.calls) == 5
+
+@pytest.mark.asyncio
+async def test_exceeded_latency_budget_fails_and_counts_against_the_breaker(upstream, monkeypatch):
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_LATENCY_BUDGET_SECONDS", 0.02)
+    upstream.handler = respond(200, TRANSITS, delay=1.0)
+
+    with pytest.raises(AstrologyServiceConnectionError, match="timed out"):
+        await get_daily_transits("c1", POSITIONS)
+
+    assert astrology_client.request_metrics['budget_exceeded'] == 1
+    assert astrology_client.breaker.consecutive_failures == 1
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_a_slow_first_attempt(upstream, monkeypatch):
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_HEDGE_ENABLED", True)
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_HEDGE_DELAY_MS", 10.0)
+    slow, fast = respond(200, {**TRANSITS, "attempt": 1}, delay=1.0), respond(200, {**TRANSITS, "attempt": 2})
+    upstream.handler = lambda request: (slow if len(upstream.calls) == 1 else fast)(request)
+
+    result = await get_daily_transits("c1", POSITIONS)
+
+    assert result["attempt"] == 2
+    assert len(upstream.calls) == 2
+    assert astrology_client.request_metrics['hedged'] == 1
+    assert astrology_client.request_metrics['hedge_wins'] == 1
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_calls_share_one_request(upstream):
+    upstream.handler = respond(200, TRANSITS, delay=0.02)
+
+    results = await asyncio.gather(*(get_daily_transits("c1", POSITIONS) for _ in range(5)))
+
+    assert results == [TRANSITS] * 5
+    assert len(upstream.calls) == 1
+    assert astrology_client.single_flight.stats() == {'requests': 1, 'coalesced': 4, 'in_flight': 0}
+    # Each caller gets its own copy
+    results[1]["aspects"].append("changed")
+    assert results[0]["aspects"] == []
+
+@pytest.mark.asyncio
+async def test_coalesced_callers_share_the_error(upstream):
+    upstream.handler = respond(422, delay=0.02)
+
+    results = await asyncio.gather(*(get_daily_transits("c1", POSITIONS) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, AstrologyServiceClientError) for result in results)
+    assert len(upstream.calls) == 1
+
+@pytest.mark.asyncio
+async def test_micro_batcher_splits_a_failed_batch_down_to_the_bad_item():
+    sent = []
+
+    async def send(items):
+        sent.append(list(items))
+        if "bad" in items:
+            raise AstrologyServiceServerError("Astrology service failed")
+        return [item.upper() for item in items]
+
+    batcher = MicroBatcher(send, window_seconds=0.01, max_size=10, split_on=(AstrologyServiceServerError,))
+    results = await asyncio.gather(*(batcher.submit(item) for item in ("a", "bad", "c")), return_exceptions=True)
+
+    assert results[0] == "A" and results[2] == "C"
+    assert isinstance(results[1], AstrologyServiceServerError)
+    assert sent == [["a", "bad", "c"], ["a"], ["bad", "c"], ["bad"], ["c"]]
+    assert batcher.stats()['splits'] == 2
+
+@pytest.mark.asyncio
+async def test_micro_batcher_fails_every_caller_for_errors_it_does_not_split_on():
+    async def send(items):
+        raise AstrologyServiceConnectionError("Could not connect to astrology service")
+
+    batcher = MicroBatcher(send, window_seconds=0.01, max_size=10, split_on=(AstrologyServiceServerError,))
+    results = await asyncio.gather(*(batcher.submit(item) for item in "ab"), return_exceptions=True)
+
+    assert all(isinstance(result, AstrologyServiceConnectionError) for result in results)
+    assert batcher.stats()['splits'] == 0
+
+@pytest.mark.asyncio
+async def test_chart_batch_maps_item_errors_and_splits_without_opening_the_breaker(upstream):
+    async def handler(request):
+        records = json.loads(request.content)["records"]
+        if any(record.get("crash") for record in records):
+            return httpx.Response(500, json={"detail": "Internal Server Error"})
+        return httpx.Response(200, json={"results": [
+            {"index": i, "error": "Invalid latitude: 95.0"} if record["latitude"] > 90 else {"index": i, "chart": record}
+            for i, record in enumerate(records)
+        ]})
+    upstream.handler = handler
+    batcher = MicroBatcher(
+        astrology_client._send_chart_batch, window_seconds=0.01, max_size=10,
+        split_on=(AstrologyServiceClientError, AstrologyServiceServerError)
+    )
+    records = [{"latitude": 10.0}, {"latitude": 95.0}, {"latitude": 20.0, "crash": True}, {"latitude": 30.0}]
+
+    results = await asyncio.gather(*(batcher.submit(record) for record in records), return_exceptions=True)
+
+    assert results[0] == records[0] and results[3] == records[3]
+    assert isinstance(results[1], AstrologyServiceClientError) and results[1].status_code == 400
+    assert isinstance(results[2], AstrologyServiceServerError)
+    assert [len(json.loads(call.content)["records"]) for call in upstream.calls] == [4, 2, 2, 1, 1]
+    # Failures of multi-record batches are not held against the service
+    assert astrology_client.breaker.consecutive_failures <= 1
+    assert astrology_client.breaker.transitions == {}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [429, 503])
+async def test_chart_batch_turned_away_by_a_busy_service_fails_at_once(upstream, status_code):
+    async def handler(request):
+        return httpx.Response(status_code, json={"detail": "busy"}, headers={"Retry-After": "2"})
+    upstream.handler = handler
+    batcher = MicroBatcher(
+        astrology_client._send_chart_batch, window_seconds=0.01, max_size=32,
+        split_on=astrology_client.chart_batcher.split_on
+    )
+
+    results = await asyncio.gather(
+        *(batcher.submit({"latitude": float(i)}) for i in range(32)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, AstrologyServiceBusyError) for result in results)
+    assert {(result.status_code, result.retry_after) for result in results} == {(status_code, 2.0)}
+    assert len(upstream.calls) == 1
+    assert batcher.stats()['splits'] == 0
+    # Only a service that is still starting counts against the breaker
+    assert astrology_client.breaker.consecutive_failures == (1 if status_code == 503 else 0)
+
+@pytest.mark.asyncio
+async def test_chart_batch_is_not_split_for_client_errors_no_record_can_cause(upstream):
+    upstream.handler = respond(404)
+    batcher = MicroBatcher(
+        astrology_client._send_chart_batch, window_seconds=0.01, max_size=4,
+        split_on=astrology_client.chart_batcher.split_on
+    )
+
+    results = await asyncio.gather(*(batcher.submit({"latitude": float(i)}) for i in range(4)), return_exceptions=True)
+
+    assert all(isinstance(result, AstrologyServiceClientError) and result.status_code == 404 for result in results)
+    assert len(upstream.calls) == 1
+
+@pytest.mark.asyncio
+async def test_birth_chart_is_requested_from_the_calculate_chart_route(upstream, monkeypatch):
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_BATCH_ENABLED", False)
+    chart = {"sun_sign": "Taurus"}
+    upstream.handler = respond(200, chart)
+
+    assert await astrology_client.create_birth_chart({"birth_date": "1990-05-17"}) == chart
+
+    assert upstream.calls[0].method == "POST"
+    assert upstream.calls[0].url.path == "/calculate-chart"
+
+@pytest.mark.asyncio
+async def test_msgpack_responses_are_decoded(upstream, monkeypatch):
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_WIRE_FORMAT", "msgpack")
+    transits = {**TRANSITS, "natal_longitudes": {"sun": 56.42}}
+
+    async def handler(request):
+        assert request.headers["accept"].startswith(astrology_client.MSGPACK_MEDIA_TYPE)
+        return httpx.Response(
+            200, content=msgpack.packb(transits, use_bin_type=True),
+            headers={"Content-Type": astrology_client.MSGPACK_MEDIA_TYPE}
+        )
+    upstream.handler = handler
+
+    assert await get_daily_transits("c1", POSITIONS) == transits
+
+@pytest.mark.asyncio
+async def test_json_is_decoded_when_the_service_falls_back_to_it(upstream, monkeypatch):
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_WIRE_FORMAT", "msgpack")
+    upstream.handler = respond(200, TRANSITS)
+
+    assert await get_daily_transits("c1", POSITIONS) == TRANSITS
+
+def test_client_timeouts_come_from_their_own_settings(monkeypatch):
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_CONNECT_TIMEOUT_SECONDS", 1.0)
+    monkeypatch.setattr(astrology_client.settings, "ASTROLOGY_WRITE_TIMEOUT_SECONDS", 7.0)
+
+    timeout = astrology_client._create_client().timeout
+
+    assert timeout.connect == 1.0
+    assert timeout.write == 7.0
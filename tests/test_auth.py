@@ -1,40 +1,112 @@
+import bcrypt
 import pytest
 from fastapi.testclient import TestClient
-import os
+from app.core.config import get_settings
 from app.main import app
 from app.models.user import User
-from app.core.config import settings
+from app.services.principal_cache import principal_cache
 
-@pytest.fixture(scope="module")
-def client():
-    with TestClient(app) as c:
-        yield c
+SIGNUP = {
+    "email": "testuser@example.com",
+    "password": "testpassword",
+    "first_name": "Test",
+    "last_name": "User",
+    "birth_details": {
+        "date": "2000-01-01",
+        "time": "12:00",
+        "location": "New York, NY"
+    }
+}
 
-@pytest.fixture(scope="module", autouse=True)
-def setup_teardown_db():
-    # Setup: clean up the user before the test
-    User.objects(email="testuser@example.com").delete()
-    yield
-    # Teardown: clean up the user after the test
-    User.objects(email="testuser@example.com").delete()
+@pytest.fixture
+def client(mongo):
+    # Without the context manager the lifespan, which connects to the real MongoDB, doesn't run
+    principal_cache.clear()
+    yield TestClient(app)
+    principal_cache.clear()
+
+@pytest.fixture
+def tokens(client):
+    response = client.post("/api/v1/auth/signup", json=SIGNUP)
+    assert response.status_code == 200
+    return response.json()
+
+def login(client, password="testpassword"):
+    return client.post("/api/v1/auth/login", data={"username": SIGNUP["email"], "password": password})
+
+def refresh(client, refresh_token):
+    return client.post("/api/v1/auth/refresh-token", json={"refresh_token": refresh_token})
 
 def test_signup(client):
-    response = client.post(
-        "/api/v1/auth/signup",
-        json={
-            "email": "testuser@example.com",
-            "password": "testpassword",
-            "first_name": "Test",
-            "last_name": "User",
-            "birth_details": {
-                "date": "2000-01-01",
-                "time": "12:00",
-                "location": "New York, NY"
-            }
-        },
-    )
+    response = client.post("/api/v1/auth/signup", json=SIGNUP)
     assert response.status_code == 200
     data = response.json()
     assert "access_token" in data
     assert "refresh_token" in data
-    assert data["token_type"] == "bearer"
\ No newline at end of file
+    assert data["token_type"] == "bearer"
+
+    user = User.objects.get(email=SIGNUP["email"])
+    assert user.name == "Test User"
+    assert user.preferences == {"birth_details": SIGNUP["birth_details"]}
+    assert user.password_hash != SIGNUP["password"]
+    assert user.refresh_token_hash and user.refresh_token is None
+
+def test_signup_rejects_a_registered_email(client, tokens):
+    response = client.post("/api/v1/auth/signup", json={**SIGNUP, "first_name": "Other"})
+    assert response.status_code == 400
+    assert User.objects(email=SIGNUP["email"]).count() == 1
+
+def test_me_returns_the_stored_profile(client, tokens):
+    response = client.get("/api/v1/auth/me", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Test User"
+    assert response.json()["email"] == SIGNUP["email"]
+
+def test_login(client, tokens):
+    assert login(client, "wrong").status_code == 401
+
+    response = login(client)
+
+    assert response.status_code == 200
+    user = User.objects.get(email=SIGNUP["email"])
+    assert user.last_login is not None
+    # Logging in replaces the signup refresh token
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+    assert refresh(client, response.json()["refresh_token"]).status_code == 200
+
+def _cost(password_hash):
+    return int(password_hash.split("$")[2])
+
+def test_login_rehashes_a_password_stored_with_another_cost(client, tokens):
+    rounds = get_settings().PASSWORD_HASH_ROUNDS
+    # bcrypt's minimum cost is 4, which the tests run with
+    outdated = rounds - 1 if rounds > 4 else rounds + 1
+    outdated_hash = bcrypt.hashpw(SIGNUP["password"].encode(), bcrypt.gensalt(rounds=outdated)).decode()
+    User.objects(email=SIGNUP["email"]).update_one(set__password_hash=outdated_hash)
+
+    assert login(client).status_code == 200
+
+    rehashed = User.objects.get(email=SIGNUP["email"]).password_hash
+    assert rehashed != outdated_hash
+    assert _cost(rehashed) == rounds
+    assert login(client).status_code == 200
+    assert User.objects.get(email=SIGNUP["email"]).password_hash == rehashed
+
+def test_refresh_rotates_the_token(client, tokens):
+    response = refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 200
+    rotated = response.json()["refresh_token"]
+    assert rotated != tokens["refresh_token"]
+    assert refresh(client, rotated).status_code == 200
+
+def test_reused_refresh_token_is_rejected(client, tokens):
+    assert refresh(client, tokens["refresh_token"]).status_code == 200
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
+
+def test_logout_revokes_the_refresh_token(client, tokens):
+    response = client.post("/api/v1/auth/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+
+    assert response.status_code == 200
+    assert User.objects.get(email=SIGNUP["email"]).refresh_token_hash is None
+    assert refresh(client, tokens["refresh_token"]).status_code == 401
@@ -0,0 +1,81 @@
+from datetime import datetime
+import pytest
+import pytz
+from app.services.chart_cache import ChartCache, chart_cache_key
+
+BIRTH_DATA = {
+    "birth_date": "1990-05-17",
+    "birth_time": "14:30",
+    "latitude": 40.7128,
+    "longitude": -74.0060,
+    "timezone": "America/New_York"
+}
+
+def service_instant(birth_date, birth_time, timezone):
+    """The UTC instant the astrology service computes a chart for (calculations.parse_birth_datetime)."""
+    local = datetime.strptime(f"{birth_date} {birth_time}", "%Y-%m-%d %H:%M")
+    return pytz.timezone(timezone).localize(local).astimezone(pytz.utc)
+
+def key_for_instant(instant):
+    utc = {**BIRTH_DATA, "timezone": "UTC",
+           "birth_date": instant.strftime("%Y-%m-%d"), "birth_time": instant.strftime("%H:%M")}
+    return chart_cache_key(utc)
+
+@pytest.mark.parametrize("birth_date,birth_time", [
+    ("1990-05-17", "14:30"),
+    ("2023-11-05", "01:30"),  # ambiguous: happens twice as clocks fall back
+    ("2023-03-12", "02:30")  # nonexistent: skipped as clocks spring forward
+])
+def test_key_resolves_local_time_like_the_service(birth_date, birth_time):
+    birth_data = {**BIRTH_DATA, "birth_date": birth_date, "birth_time": birth_time}
+    instant = service_instant(birth_date, birth_time, "America/New_York")
+    assert chart_cache_key(birth_data) == key_for_instant(instant)
+
+def test_equivalent_zone_names_share_a_key():
+    assert chart_cache_key(BIRTH_DATA) == chart_cache_key({**BIRTH_DATA, "timezone": "US/Eastern"})
+
+def test_key_changes_with_the_cache_version(monkeypatch):
+    key = chart_cache_key(BIRTH_DATA)
+    monkeypatch.setattr("app.services.chart_cache.CHART_CACHE_VERSION", 3)
+    assert chart_cache_key(BIRTH_DATA) != key
+
+@pytest.mark.parametrize("change", [
+    {"timezone": "Not/AZone"},
+    {"birth_time": "25:00"},
+    {"latitude": None}
+])
+def test_unnormalizable_data_has_no_key(change):
+    assert chart_cache_key({**BIRTH_DATA, **change}) is None
+
+@pytest.mark.asyncio
+async def test_get_or_create_serves_both_tiers(mongo):
+    cache = ChartCache(max_size=10, ttl_seconds=60)
+    calls = []
+
+    async def create(birth_data):
+        calls.append(birth_data)
+        return {"sun_sign": "Taurus", "birth_data": {"timezone": birth_data["timezone"]}}
+
+    assert (await cache.get_or_create(BIRTH_DATA, create))["sun_sign"] == "Taurus"
+    assert (await cache.get_or_create(BIRTH_DATA, create))["sun_sign"] == "Taurus"
+    cache.clear()
+    equivalent = {**BIRTH_DATA, "timezone": "US/Eastern"}
+    chart = await cache.get_or_create(equivalent, create)
+
+    assert len(calls) == 1
+    assert chart["birth_data"]["timezone"] == "US/Eastern"
+    assert cache.stats()["mongo_hits"] == 1
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_not_served(mongo):
+    cache = ChartCache(max_size=10, ttl_seconds=-1)
+    calls = []
+
+    async def create(birth_data):
+        calls.append(birth_data)
+        return {"sun_sign": "Taurus"}
+
+    await cache.get_or_create(BIRTH_DATA, create)
+    await cache.get_or_create(BIRTH_DATA, create)
+
+    assert len(calls) == 2
@@ -0,0 +1,166 @@
+from datetime import datetime, timezone
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1 import chart
+from app.core.dependencies import get_current_user, get_current_user_readonly
+from app.models.birthchart import BirthChart, BirthData, ChartData
+from app.models.transit_cache import TransitCacheEntry
+from app.models.user import User
+from app.services.astrology_client import AstrologyServiceBusyError
+from app.services.chart_cache import chart_cache
+from app.services.transit_cache import local_day, transit_cache
+
+TRANSITS = {"transits": [{"planet": "Sun", "natal_planet": "Moon", "aspect": "trine"}]}
+CHART = {
+    "ascendant": "Virgo",
+    "sun_sign": "Taurus",
+    "moon_sign": "Aries",
+    "planet_positions": {"sun": {"ra": 3.6, "dec": 19.2, "distance": 1.01}},
+    "aspects": []
+}
+
+@pytest.fixture
+def user(mongo):
+    user = User(email="chart@example.com", name="Chart Owner")
+    user.save()
+    return user
+
+@pytest.fixture
+def birth_chart(user):
+    birth_chart = BirthChart(
+        user=user,
+        birth_data=BirthData(
+            date=datetime(1990, 5, 17), time="14:30", city="New York", state="NY", country="USA",
+            latitude=40.7128, longitude=-74.0060, timezone="America/New_York"
+        ),
+        chart_data=ChartData.from_service(CHART)
+    )
+    birth_chart.save()
+    return birth_chart
+
+@pytest.fixture
+def client(user, monkeypatch):
+    calls = []
+
+    async def fake_create_birth_chart(birth_data):
+        calls.append(birth_data)
+        return CHART
+
+    async def fake_get_daily_transits(birth_chart_id, planet_positions, at):
+        calls.append((birth_chart_id, at))
+        return TRANSITS
+
+    monkeypatch.setattr(chart, "create_birth_chart", fake_create_birth_chart)
+    monkeypatch.setattr(chart, "get_daily_transits", fake_get_daily_transits)
+    chart_cache.clear()
+    transit_cache.clear()
+    app = FastAPI()
+    app.include_router(chart.router, prefix="/api/v1/chart")
+    app.dependency_overrides[get_current_user] = lambda: user
+    app.dependency_overrides[get_current_user_readonly] = lambda: user
+    client = TestClient(app)
+    client.upstream_calls = calls
+    yield client
+    chart_cache.clear()
+    transit_cache.clear()
+
+def test_created_chart_can_be_read_back(client, user):
+    request = {
+        "birth_date": "1990-05-17", "birth_time": "14:30", "latitude": 40.7128, "longitude": -74.0060,
+        "timezone": "America/New_York", "city": "New York", "state": "NY", "country": "USA"
+    }
+
+    response = client.post("/api/v1/chart/", json=request)
+
+    assert response.status_code == 200
+    created = response.json()
+    assert client.upstream_calls == [{
+        "birth_date": "1990-05-17", "birth_time": "14:30", "latitude": 40.7128, "longitude": -74.0060,
+        "timezone": "America/New_York"
+    }]
+    stored = BirthChart.objects.get(id=created["id"])
+    assert stored.user.id == user.id
+    assert stored.birth_data.date == datetime(1990, 5, 17)
+    assert stored.birth_data.city == "New York"
+    assert stored.chart_data.planet_positions == CHART["planet_positions"]
+
+    response = client.get(f"/api/v1/chart/{created['id']}")
+
+    assert response.status_code == 200
+    assert response.json()["chart_data"] == {
+        "ascendant": "Virgo", "sun_sign": "Taurus", "moon_sign": "Aries",
+        "planets": CHART["planet_positions"], "houses": {}, "aspects": []
+    }
+    assert response.json()["birth_data"]["timezone"] == "America/New_York"
+
+def test_create_chart_rejects_a_malformed_birth_date(client):
+    request = {
+        "birth_date": "17/05/1990", "birth_time": "14:30", "latitude": 40.7128, "longitude": -74.0060,
+        "timezone": "America/New_York", "city": "New York", "state": "NY", "country": "USA"
+    }
+
+    assert client.post("/api/v1/chart/", json=request).status_code == 400
+    assert client.upstream_calls == []
+
+def test_busy_astrology_service_is_reported_with_its_retry_after(client, monkeypatch):
+    async def busy_create_birth_chart(birth_data):
+        raise AstrologyServiceBusyError(429, 2.5)
+
+    monkeypatch.setattr(chart, "create_birth_chart", busy_create_birth_chart)
+    request = {
+        "birth_date": "1990-05-17", "birth_time": "14:30", "latitude": 40.7128, "longitude": -74.0060,
+        "timezone": "America/New_York", "city": "New York", "state": "NY", "country": "USA"
+    }
+
+    response = client.post("/api/v1/chart/", json=request)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+def test_user_charts_lists_only_the_current_users_charts(client, birth_chart):
+    other = User(email="other@example.com", name="Someone Else")
+    other.save()
+    BirthChart(user=other, birth_data=birth_chart.birth_data, chart_data=birth_chart.chart_data).save()
+
+    response = client.get("/api/v1/chart/user")
+
+    assert response.status_code == 200
+    assert [chart["id"] for chart in response.json()] == [str(birth_chart.id)]
+
+def test_transits_are_cached_per_chart(client, birth_chart):
+    chart_id = str(birth_chart.id)
+    for _ in range(2):
+        response = client.get(f"/api/v1/chart/{chart_id}/transits")
+        assert response.status_code == 200
+        assert response.json() == TRANSITS
+    assert client.upstream_calls == [(chart_id, local_day("America/New_York")[1])]
+    assert TransitCacheEntry.objects(chart_id=chart_id).count() == 1
+
+def test_delete_chart_drops_cached_transits(client, birth_chart):
+    chart_id = str(birth_chart.id)
+    assert client.get(f"/api/v1/chart/{chart_id}/transits").status_code == 200
+
+    response = client.delete(f"/api/v1/chart/{chart_id}")
+
+    assert response.status_code == 200
+    assert BirthChart.objects(id=chart_id).count() == 0
+    assert TransitCacheEntry.objects(chart_id=chart_id).count() == 0
+    assert transit_cache.stats()["size"] == 0
+
+def test_delete_chart_of_another_user_is_not_found(client, birth_chart):
+    other = User(email="other@example.com", name="Someone Else")
+    other.save()
+    client.app.dependency_overrides[get_current_user] = lambda: other
+
+    response = client.delete(f"/api/v1/chart/{birth_chart.id}")
+
+    assert response.status_code == 404
+    assert BirthChart.objects(id=birth_chart.id).count() == 1
+
+def test_local_day_noon_is_inside_the_local_date():
+    now = datetime(2024, 3, 10, 3, 30)  # 23:30 on March 9 in New York, before the DST change
+    local_date, noon, expires_at = local_day("America/New_York", now.replace(tzinfo=timezone.utc))
+    assert local_date == "2024-03-09"
+    assert noon == datetime(2024, 3, 9, 17, 0, tzinfo=timezone.utc)
+    assert expires_at == datetime(2024, 3, 10, 5, 0)
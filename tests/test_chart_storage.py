@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime
+import mongomock
+import pytest
+from app.migrate_chart_storage import migrate
+from app.models.birthchart import (
+    BirthChart, CHART_SCHEMA_VERSION, ChartData, pack_houses, pack_positions, unpack_houses, unpack_positions
+)
+
+PLANETS = {
+    'sun': {
+        'ra': 3.61, 'dec': 19.27, 'distance': 1.0115, 'latitude': 0.0001, 'longitude': 56.42,
+        'sign': 'Taurus', 'sign_degree': 26.42, 'sidereal_longitude': 32.7, 'sidereal_sign': 'Taurus',
+        'sidereal_sign_degree': 2.7, 'nakshatra': 'Krittika', 'pada': 3
+    },
+    'moon': {'ra': 0.52, 'dec': 2.1, 'distance': 0.0026, 'longitude': 8.25, 'sign': 'Aries'},
+    'pluto': {'ra': 15.3, 'dec': -0.9}
+}
+HOUSES = {
+    'system': 'sripathi',
+    'ascendant': 160.5,
+    'mc': 70.25,
+    'cusps': {str(house): house * 30.0 + 0.5 for house in range(1, 13)},
+    'midpoints': {str(house): house * 30.0 + 15.5 for house in range(1, 13)}
+}
+CHART = {'ascendant': 'Virgo', 'sun_sign': 'Taurus', 'moon_sign': 'Aries'}
+
+def test_positions_round_trip():
+    assert unpack_positions(pack_positions(PLANETS)) == PLANETS
+
+def test_houses_round_trip():
+    assert unpack_houses(pack_houses(HOUSES), 'sripathi') == HOUSES
+    placidus = {key: value for key, value in HOUSES.items() if key != 'midpoints'}
+    assert unpack_houses(pack_houses(placidus), 'sripathi') == placidus
+
+def test_pack_positions_rejects_what_it_cannot_hold():
+    with pytest.raises(ValueError, match="Cannot pack bodies: chiron"):
+        pack_positions({**PLANETS, 'chiron': {'ra': 1.0}})
+    with pytest.raises(ValueError, match="Cannot pack sun fields: speed"):
+        pack_positions({'sun': {**PLANETS['sun'], 'speed': 0.98}})
+
+def test_from_service_logs_and_ignores_unknown_position_fields(caplog):
+    planet_positions = {**PLANETS, 'sun': {**PLANETS['sun'], 'speed': 0.98}, 'chiron': {'ra': 1.0}}
+
+    with caplog.at_level(logging.WARNING, logger='app.models.birthchart'):
+        chart_data = ChartData.from_service({**CHART, 'planet_positions': planet_positions, 'houses': HOUSES})
+
+    assert chart_data.planet_positions == PLANETS
+    assert chart_data.house_data == HOUSES
+    assert 'chiron' in caplog.text and 'speed' in caplog.text
+
+@pytest.fixture
+def bulk_write(monkeypatch):
+    """mongomock's bulk_write predates the pymongo installed here; apply the updates one by one."""
+    def bulk_write(collection, operations, ordered=True):
+        for operation in operations:
+            collection.update_one(operation._filter, operation._doc)
+    monkeypatch.setattr(mongomock.collection.Collection, 'bulk_write', bulk_write)
+
+def _insert_v1_chart(planets):
+    return BirthChart._get_collection().insert_one({
+        'user': None,
+        'birth_data': {'date': datetime(1990, 5, 17), 'time': '14:30', 'timezone': 'UTC'},
+        'chart_data': {**CHART, 'planets': planets, 'houses': HOUSES, 'aspects': []},
+        'created_at': datetime(2024, 1, 1)
+    }).inserted_id
+
+def test_migration_packs_version_1_charts(mongo, bulk_write):
+    migrated = [_insert_v1_chart(PLANETS) for _ in range(3)]
+    skipped = _insert_v1_chart({**PLANETS, 'chiron': {'ra': 1.0}})
+
+    assert migrate(batch_size=2) == {'migrated': 3, 'skipped': 1}
+
+    collection = BirthChart._get_collection()
+    for chart_id in migrated:
+        chart_data = ChartData._from_son(collection.find_one({'_id': chart_id})['chart_data'])
+        assert chart_data.schema_version == CHART_SCHEMA_VERSION
+        assert chart_data.planets == {} and chart_data.houses == {}
+        assert chart_data.planet_positions == PLANETS
+        assert chart_data.house_data == HOUSES
+    assert collection.find_one({'_id': skipped})['chart_data']['planets']['chiron'] == {'ra': 1.0}
+    # Already migrated charts are not picked up again
+    assert migrate() == {'migrated': 0, 'skipped': 1}
+
+def test_migration_dry_run_writes_nothing(mongo, bulk_write):
+    chart_id = _insert_v1_chart(PLANETS)
+
+    assert migrate(dry_run=True) == {'migrated': 1, 'skipped': 0}
+
+    assert 'positions' not in BirthChart._get_collection().find_one({'_id': chart_id})['chart_data']
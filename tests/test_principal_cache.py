@@ -0,0 +1,77 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.user import User
+from app.services.principal_cache import principal_cache
+
+@pytest.fixture
+def client(mongo):
+    principal_cache.clear()
+    yield TestClient(app)
+    principal_cache.clear()
+
+@pytest.fixture
+def headers(client):
+    response = client.post("/api/v1/auth/signup", json={
+        "email": "cached@example.com", "password": "testpassword", "first_name": "Cached", "last_name": "User"
+    })
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def me(client, headers):
+    return client.get("/api/v1/auth/me", headers=headers)
+
+def test_repeated_requests_with_one_token_load_the_user_once(client, headers):
+    for _ in range(3):
+        assert me(client, headers).status_code == 200
+    assert principal_cache.stats()['misses'] == 1
+    assert principal_cache.stats()['hits'] == 2
+
+def test_profile_change_invalidates_the_cached_user(client, headers):
+    assert me(client, headers).json()["name"] == "Cached User"
+
+    response = client.patch("/api/v1/user/profile", headers=headers, json={"name": "Renamed", "preferences": {"tone": "brief"}})
+
+    assert response.status_code == 200
+    profile = me(client, headers).json()
+    assert profile["name"] == "Renamed"
+    assert profile["preferences"] == {"tone": "brief"}
+
+def test_profile_update_needs_a_field(client, headers):
+    assert client.patch("/api/v1/user/profile", headers=headers, json={}).status_code == 400
+
+def test_profile_update_cannot_clear_the_name(client, headers):
+    response = client.patch("/api/v1/user/profile", headers=headers, json={"name": None})
+
+    assert response.status_code == 422
+    assert User.objects.get(email="cached@example.com").name == "Cached User"
+
+def test_profile_update_clears_optional_fields_with_null(client, headers):
+    assert client.patch("/api/v1/user/profile", headers=headers, json={"avatarUrl": "https://example.com/a.png"}).status_code == 200
+
+    assert client.patch("/api/v1/user/profile", headers=headers, json={"avatarUrl": None}).status_code == 200
+
+    assert User.objects.get(email="cached@example.com").avatarUrl is None
+
+def test_logout_invalidates_the_cached_user(client, headers):
+    assert me(client, headers).status_code == 200
+
+    assert client.post("/api/v1/auth/logout", headers=headers).status_code == 200
+
+    assert principal_cache.stats()['size'] == 0
+
+def test_deleted_account_loses_access_at_once(client, headers):
+    assert me(client, headers).status_code == 200
+
+    assert client.delete("/api/v1/user/account", headers=headers).status_code == 200
+
+    assert User.objects(email="cached@example.com").count() == 0
+    assert me(client, headers).status_code == 401
+
+def test_stale_entry_outlives_a_change_without_invalidation(client, headers):
+    assert me(client, headers).status_code == 200
+    User.objects(email="cached@example.com").update_one(set__name="Changed Elsewhere")
+
+    # Another worker's change shows up only once the entry expires
+    assert me(client, headers).json()["name"] == "Cached User"
+    principal_cache.invalidate(User.objects.get(email="cached@example.com").id)
+    assert me(client, headers).json()["name"] == "Changed Elsewhere"